@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from .crud.versioning import data_version_token
+from .responses import ORJSONResponse, dumps
+
+# Número máximo de respostas guardadas por processo
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "256"))
+
+
+class ResponseCache:
+    """
+    Cache LRU limitado de respostas já serializadas (bytes JSON). Cada entrada
+    guarda a versão dos dados com que foi calculada e só vale enquanto essa
+    versão for a atual.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version: str, content):
+        with self._lock:
+            self._entries[key] = (version, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+_adapters = {}
+
+
+def _dump(response_model, result) -> bytes:
+    # Sem response_model o resultado já está no formato da resposta (dicts,
+    # Rows ou schemas prontos): só serializa, sem validar de novo
+    if response_model is None:
+        return dumps(result)
+    # Valida/serializa como o response_model do FastAPI faria
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = _adapters[response_model] = TypeAdapter(response_model)
+    return adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """
+    If-None-Match com a comparação fraca do HTTP: lista separada por
+    vírgulas, prefixo W/ ignorado dos dois lados, tags comparadas inteiras
+    e "*" casando com qualquer representação.
+    """
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+async def cached_response(
+    request: Request, db: AsyncSession, response_model, load, build
+):
+    """
+    Responde a partir do cache quando os dados não mudaram desde o cálculo.
+    A chave é a rota + parâmetros; o ETag carrega a versão dos dados, então um
+    If-None-Match igual vira 304 sem recalcular nada. O cache guarda os bytes
+    JSON, então um acerto não serializa nada. Com response_model=None o
+    resultado de `build` é tratado como já validado.
+
+    Num miss, `load(session)` faz as consultas na AsyncSession e `build` (o
+    trabalho de CPU: NumPy, LTTB, montagem) roda no threadpool junto com a
+    serialização, sem travar o event loop para as outras requisições.
+    """
+    version = await db.run_sync(data_version_token)
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    etag = 'W/"{}-{}"'.format(
+        version, hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+    )
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    content = response_cache.get(key, version)
+    if content is None:
+        loaded = await db.run_sync(load)
+        content = await run_in_threadpool(lambda: _dump(response_model, build(loaded)))
+        response_cache.put(key, version, content)
+    return ORJSONResponse(content, headers=headers)
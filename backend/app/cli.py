@@ -0,0 +1,86 @@
+# backend/app/cli.py
+# Comandos de manutenção: python -m app.cli <comando>
+
+import argparse
+from .database import SessionLocal, engine
+from . import crud
+from .migrations import run_migrations, migration_status, explain_hot_queries
+
+
+def rebuild_rollups(args):
+    with SessionLocal() as db:
+        crud.rebuild_daily_totals(db)
+    print("✅ daily_totals e monthly_totals recalculadas a partir de transactions.")
+
+
+def retag(args):
+    with SessionLocal() as db:
+        result = crud.retag_uncategorized_transactions(
+            db, search=args.search, type=args.type,
+            month_year=args.month, dry_run=args.dry_run,
+        )
+    action = "seriam categorizadas" if result["dry_run"] else "categorizadas"
+    print(
+        f"{result['matched']} de {result['scanned']} transações sem categoria {action} "
+        f"em {result['elapsed_ms'] / 1000:.1f}s"
+    )
+    for item in result["categories"]:
+        print(f"  {item['count']:>8}  {item['category_name']}")
+
+
+def migrate(args):
+    applied = run_migrations(engine)
+    if applied:
+        for name in applied:
+            print(f"✅ Migração aplicada: {name}")
+    else:
+        print("Banco já está na versão mais recente.")
+
+
+def migrations(args):
+    for version, name, applied in migration_status(engine):
+        print(f"{version:04d}  {'aplicada ' if applied else 'pendente '}  {name}")
+
+
+def explain(args):
+    for label, statement, plan in explain_hot_queries(engine):
+        print(f"\n=== {label} ===")
+        if args.sql:
+            print(statement.strip())
+        for line in plan:
+            print(f"  {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção do Painel Financeiro BI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "rebuild-rollups", help="Recalcula os agregados diários (backfill/reparo)"
+    ).set_defaults(func=rebuild_rollups)
+    retag_parser = commands.add_parser(
+        "retag", help="Aplica as palavras-chave às transações sem categoria"
+    )
+    retag_parser.add_argument("--dry-run", action="store_true", help="Só mostra a prévia")
+    retag_parser.add_argument("--search", help="Filtro de busca na descrição")
+    retag_parser.add_argument("--type", help="expense, income ou investment")
+    retag_parser.add_argument("--month", help="Mês no formato YYYY-MM")
+    retag_parser.set_defaults(func=retag)
+    commands.add_parser(
+        "migrate", help="Aplica as migrações pendentes do banco"
+    ).set_defaults(func=migrate)
+    commands.add_parser(
+        "migrations", help="Lista as migrações e se já foram aplicadas"
+    ).set_defaults(func=migrations)
+    explain_parser = commands.add_parser(
+        "explain", help="Mostra o plano de execução das consultas mais usadas"
+    )
+    explain_parser.add_argument("--sql", action="store_true", help="Mostra também o SQL")
+    explain_parser.set_defaults(func=explain)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,14 @@ from .category import (
     find_category_by_keyword,
     get_category_by_id,
     delete_category,
+    update_category,
 )
 from .transaction import (
     create_quick_entry,
     get_recent_transactions,
     get_all_transactions,
     get_available_months,
+    get_month_summaries,
     delete_transaction,
     update_transaction,
     get_uncategorized_count,
@@ -19,12 +21,47 @@ from .dashboard import (
     get_dashboard_kpis,
     get_expenses_by_category,
     get_balance_over_time,
+    get_dashboard_bundle,
+    load_dashboard_kpis,
+    build_dashboard_kpis,
+    load_expenses_by_category,
+    build_expenses_by_category,
+    load_balance_over_time,
+    build_balance_over_time,
+    load_dashboard_bundle,
+    build_dashboard_bundle,
 )
 from .goal import (
     get_goals_page_data,
+    load_goals_page,
+    build_goals_page,
     create_goal,
     update_goal,
     delete_goal,
+    add_contribution_to_goal,
+    add_goal_contributions,
+    get_goal_contributions,
 )
-from .report import get_report_expenses_by_category
-from .importer import process_import_file
\ No newline at end of file
+from .report import (
+    get_report_expenses_by_category,
+    load_report_expenses_by_category,
+    build_report_expenses_by_category,
+)
+from .importer import (
+    process_import_file,
+    create_import_job,
+    get_import_job,
+    list_import_jobs,
+    run_import_job,
+    fail_interrupted_import_jobs,
+)
+from .tagging import category_tagger
+from .bulk import (
+    bulk_create_transactions,
+    bulk_update_transactions,
+    bulk_recategorize_transactions,
+    bulk_delete_transactions,
+    retag_uncategorized_transactions,
+)
+from .export import export_transactions, EXPORT_MEDIA_TYPES
+from .rollup import rebuild_daily_totals, rebuild_monthly_totals
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Versões assíncronas das funções do CRUD, para as rotas async. Cada uma roda a
+função síncrona com a Session por trás da AsyncSession (AsyncSession.run_sync):
+a mesma regra de negócio, mas o acesso ao banco é esperado no event loop pelo
+driver assíncrono (aiosqlite/asyncpg) em vez de prender uma thread do threadpool.
+As que escrevem esperam antes a vez na fila de escrita do SQLite.
+"""
+import functools
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import write_queue
+from . import category, transaction, goal, importer, bulk
+
+
+def _run_sync(fn):
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def _run_write(fn):
+    """Como _run_sync, mas esperando a vez na fila de escrita (database.WriteQueue)."""
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        async with write_queue.async_slot():
+            # Encerra a leitura aberta antes na requisição: a escrita começa de
+            # uma transação nova, já com a vez na fila
+            if db.in_transaction():
+                await db.commit()
+            return await db.run_sync(fn, *args, **kwargs)
+
+    return wrapper
+
+
+# Categorias
+get_category_by_name = _run_sync(category.get_category_by_name)
+get_categories = _run_sync(category.get_categories)
+create_category = _run_write(category.create_category)
+delete_category = _run_write(category.delete_category)
+update_category = _run_write(category.update_category)
+
+# Transações
+create_quick_entry = _run_write(transaction.create_quick_entry)
+get_recent_transactions = _run_sync(transaction.get_recent_transactions)
+get_all_transactions = _run_sync(transaction.get_all_transactions)
+get_available_months = _run_sync(transaction.get_available_months)
+get_month_summaries = _run_sync(transaction.get_month_summaries)
+delete_transaction = _run_write(transaction.delete_transaction)
+update_transaction = _run_write(transaction.update_transaction)
+get_uncategorized_count = _run_sync(transaction.get_uncategorized_count)
+
+# Operações em lote
+bulk_create_transactions = _run_write(bulk.bulk_create_transactions)
+bulk_update_transactions = _run_write(bulk.bulk_update_transactions)
+bulk_recategorize_transactions = _run_write(bulk.bulk_recategorize_transactions)
+bulk_delete_transactions = _run_write(bulk.bulk_delete_transactions)
+
+# Metas (a página de metas só faz aqui a parte de banco; a montagem, com
+# NumPy no motor em memória, vai para o threadpool: goal.build_goals_page)
+load_goals_page = _run_sync(goal.load_goals_page)
+create_goal = _run_write(goal.create_goal)
+update_goal = _run_write(goal.update_goal)
+delete_goal = _run_write(goal.delete_goal)
+add_contribution_to_goal = _run_write(goal.add_contribution_to_goal)
+add_goal_contributions = _run_write(goal.add_goal_contributions)
+get_goal_contributions = _run_sync(goal.get_goal_contributions)
+
+# Importação
+get_import_job = _run_sync(importer.get_import_job)
+list_import_jobs = _run_sync(importer.list_import_jobs)
@@ -0,0 +1,305 @@
+import os
+import threading
+from collections import namedtuple
+from datetime import date
+from typing import Optional
+import numpy as np
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from .. import models
+from .versioning import get_data_version, TRANSACTIONS_SCOPE
+
+# Motor das leituras analíticas (dashboard, relatórios, metas): "sql" consulta
+# daily_totals no banco; "memory" responde a partir das colunas NumPy abaixo
+ANALYTICS_ENGINE = os.environ.get("ANALYTICS_ENGINE", "sql")
+
+# Sem categoria vira 0 no bincount (os ids reais são deslocados em +1)
+_NO_CATEGORY = 0
+
+# Ponto da série de saldo, com os mesmos campos da linha vinda do SQL
+BalanceRow = namedtuple("BalanceRow", ["bucket", "income", "expense", "balance"])
+
+# Colunas de um instantâneo, uma linha por (dia, tipo, categoria): dia
+# (ordinal), soma dos valores, código do tipo, categoria (+1, 0 = sem
+# categoria) e quantidade de transações
+Columns = namedtuple("Columns", ["days", "value", "type", "category", "count", "type_codes"])
+
+
+def _compact(parts, type_codes) -> Columns:
+    """
+    Junta blocos de colunas (carga + deltas) somando as linhas de mesma chave
+    (dia, tipo, categoria) e descartando as que zeraram, como em daily_totals.
+    """
+    days, value, types, category, count = (
+        np.concatenate([part[i] for part in parts]) for i in range(5)
+    )
+    if len(days):
+        n_types = max(type_codes.values(), default=0) + 1
+        n_categories = int(category.max()) + 1
+        keys = ((days.astype(np.int64) - int(days.min())) * n_types + types) * n_categories + category
+        unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        count = np.bincount(inverse, weights=count, minlength=len(unique)).astype(np.int64)
+        value = np.bincount(inverse, weights=value, minlength=len(unique))
+        keep = count > 0
+        days, types, category = days[first][keep], types[first][keep], category[first][keep]
+        value, count = value[keep], count[keep]
+    return Columns(days, value, types, category, count, dict(type_codes))
+
+
+# Leitura do banco para a cópia em memória: a versão dos dados e, se a cópia
+# estiver desatualizada, as linhas para recarregar (None = não precisa)
+SnapshotRead = namedtuple("SnapshotRead", ["version", "rows"])
+
+
+def _to_columns(rows, type_codes: dict):
+    """Linhas (date, soma, type, category_id, contagem) -> tupla de colunas."""
+    return (
+        np.array([row[0].toordinal() for row in rows], dtype=np.int32),
+        np.array([row[1] or 0.0 for row in rows], dtype=np.float64),
+        np.array(
+            [type_codes.setdefault(row[2], len(type_codes)) for row in rows], dtype=np.int64
+        ),
+        np.array(
+            [_NO_CATEGORY if row[3] is None else row[3] + 1 for row in rows],
+            dtype=np.int64,
+        ),
+        np.array([row[4] for row in rows], dtype=np.int64),
+    )
+
+
+class ColumnarAnalytics:
+    """
+    Cópia em memória, em colunas NumPy, de date/value/type/category_id das
+    transações, somadas por (dia, tipo, categoria). Carrega na primeira
+    leitura; as escritas feitas por este processo entram como deltas depois
+    do commit (os mesmos de daily_totals) e são somadas na leitura seguinte.
+    Se a versão "transactions" no banco não for a que a cópia reflete
+    (escrita de outro worker, reparo pela CLI), recarrega tudo.
+
+    A leitura tem duas partes: read() usa o banco (sem NumPy) e columns()
+    monta as colunas (só NumPy, sem banco), para as rotas async rodarem uma
+    no greenlet da AsyncSession e a outra no threadpool. O lock só protege a
+    troca das referências: a consulta e as contas ficam fora dele, então um
+    commit (after_commit chama apply()) nunca espera uma carga em andamento.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = None
+        self._pending = []
+        self._version = None
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def read(self, db: Session) -> SnapshotRead:
+        version = get_data_version(db, TRANSACTIONS_SCOPE)
+        with self._lock:
+            if self._columns is not None and version == self._version:
+                return SnapshotRead(version, None)
+        rows = db.connection().execute(
+            select(
+                models.Transaction.date,
+                func.sum(models.Transaction.value),
+                models.Transaction.type,
+                models.Transaction.category_id,
+                func.count(models.Transaction.id),
+            ).group_by(
+                models.Transaction.date,
+                models.Transaction.type,
+                models.Transaction.category_id,
+            )
+        ).all()
+        # Escrita concorrente durante a carga: serve esta, recarrega na próxima
+        if get_data_version(db, TRANSACTIONS_SCOPE) != version:
+            version = None
+        return SnapshotRead(version, rows)
+
+    def columns(self, read: SnapshotRead) -> Columns:
+        """Colunas atualizadas a partir de read(): recarga ou cópia + deltas pendentes."""
+        if read.rows is not None:
+            type_codes = {}
+            columns = _compact([_to_columns(read.rows, type_codes)], type_codes)
+            with self._lock:
+                # Uma carga de versão mais nova pode ter entrado enquanto esta montava
+                if self._version is None or read.version is None or read.version >= self._version:
+                    self._columns, self._version, self._pending = columns, read.version, []
+            return columns
+
+        with self._lock:
+            current, pending = self._columns, list(self._pending)
+        if not pending:
+            return current
+        type_codes = dict(current.type_codes)
+        columns = _compact(
+            [current, *(_to_columns(rows, type_codes) for rows in pending)], type_codes
+        )
+        with self._lock:
+            # Outra leitura pode ter somado os mesmos deltas antes: só troca se não
+            if self._columns is current:
+                self._columns = columns
+                self._pending = self._pending[len(pending):]
+        return columns
+
+    def snapshot(self, db: Session) -> Columns:
+        """Colunas atualizadas (recarrega se o banco estiver em outra versão)."""
+        return self.columns(self.read(db))
+
+    def apply(self, version_before: int, version_after: int, daily_deltas):
+        """
+        Enfileira os deltas {(date, type, category_id): [soma, contagem]} de uma
+        transação já commitada que levou a versão de `version_before` a
+        `version_after` (somados na próxima leitura, fora daqui). Fora de
+        sequência, a cópia fica para recarregar.
+        """
+        with self._lock:
+            if self._columns is None or self._version is None:
+                return
+            if self._version >= version_after:
+                return  # Já recarregada com esta escrita
+            if self._version != version_before:
+                self._version = None
+                return
+            self._version = version_after
+            if daily_deltas:
+                self._pending.append([
+                    (tx_date, total, tx_type, category_id, count)
+                    for (tx_date, tx_type, category_id), (total, count) in daily_deltas.items()
+                ])
+
+
+columnar_analytics = ColumnarAnalytics()
+
+
+def record_analytics_deltas(db: Session, daily_deltas):
+    """Guarda na sessão os deltas da escrita atual, aplicados só depois do commit."""
+    if ANALYTICS_ENGINE != "memory":
+        return
+    pending = db.info.setdefault("analytics_deltas", {})
+    for key, (total, count) in daily_deltas.items():
+        entry = pending.setdefault(key, [0.0, 0])
+        entry[0] += total
+        entry[1] += count
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_deltas(session):
+    deltas = session.info.pop("analytics_deltas", None)
+    bump = session.info.pop("data_version_bumps", {}).get(TRANSACTIONS_SCOPE)
+    if bump is not None:
+        columnar_analytics.apply(bump[0], bump[1], deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_deltas(session):
+    session.info.pop("analytics_deltas", None)
+    session.info.pop("data_version_bumps", None)
+
+
+# --- Consultas (mesmos resultados das versões SQL sobre daily_totals) ---
+# Recebem as colunas já montadas (columnar_analytics.snapshot ou columns): só
+# NumPy, sem banco, para rodarem no threadpool
+
+def _period_mask(columns: Columns, start_date: Optional[date], end_date: Optional[date]):
+    mask = np.ones(len(columns.days), dtype=bool)
+    if start_date:
+        mask &= columns.days >= start_date.toordinal()
+    if end_date:
+        mask &= columns.days <= end_date.toordinal()
+    return mask
+
+
+def _type_mask(columns: Columns, tx_type: str):
+    code = columns.type_codes.get(tx_type)
+    if code is None:
+        return np.zeros(len(columns.days), dtype=bool)
+    return columns.type == code
+
+
+def totals_by_type(columns: Columns, start_date: Optional[date], end_date: Optional[date]) -> dict:
+    """{tipo: soma} no período."""
+    mask = _period_mask(columns, start_date, end_date)
+    size = len(columns.type_codes)
+    sums = np.bincount(columns.type[mask], weights=columns.value[mask], minlength=size)
+    counts = np.bincount(columns.type[mask], weights=columns.count[mask], minlength=size)
+    return {
+        tx_type: float(sums[code])
+        for tx_type, code in columns.type_codes.items()
+        if counts[code] > 0
+    }
+
+
+def expenses_by_category_id(
+    columns: Columns, start_date: Optional[date], end_date: Optional[date]
+) -> dict:
+    """{category_id (ou None): soma das despesas} no período."""
+    mask = _period_mask(columns, start_date, end_date) & _type_mask(columns, "expense")
+    categories = columns.category[mask]
+    if not len(categories):
+        return {}
+    sums = np.bincount(categories, weights=columns.value[mask])
+    counts = np.bincount(categories, weights=columns.count[mask])
+    return {
+        (None if index == _NO_CATEGORY else int(index) - 1): float(sums[index])
+        for index in np.flatnonzero(counts > 0)
+    }
+
+
+def _bucket_days(days: np.ndarray, granularity: str) -> np.ndarray:
+    """Ordinal do início do dia/semana (segunda)/mês de cada linha."""
+    if granularity == "week":
+        return days - (days - 1) % 7  # Ordinal 1 (01/01/0001) é uma segunda
+    if granularity == "month":
+        epoch = date(1970, 1, 1).toordinal()
+        months = (days - epoch).astype("datetime64[D]").astype("datetime64[M]")
+        return months.astype("datetime64[D]").astype(np.int64) + epoch
+    return days
+
+
+def balance_over_time(
+    columns: Columns, start_date: Optional[date], end_date: Optional[date], granularity: str
+):
+    """
+    Linhas (bucket, receitas, despesas, saldo acumulado do período) em ordem
+    de data, e o saldo anterior a `start_date`.
+    """
+    income = np.where(_type_mask(columns, "income"), columns.value, 0.0)
+    expense = np.where(_type_mask(columns, "expense"), columns.value, 0.0)
+    opening = 0.0
+    if start_date:
+        before = columns.days < start_date.toordinal()
+        opening = float(income[before].sum() - expense[before].sum())
+
+    mask = _period_mask(columns, start_date, end_date)
+    buckets, inverse = np.unique(
+        _bucket_days(columns.days[mask], granularity), return_inverse=True
+    )
+    if not len(buckets):
+        return [], opening
+    income = np.bincount(inverse, weights=income[mask], minlength=len(buckets))
+    expense = np.bincount(inverse, weights=expense[mask], minlength=len(buckets))
+    counts = np.bincount(inverse, weights=columns.count[mask], minlength=len(buckets))
+    keep = counts > 0
+    buckets, income, expense = buckets[keep], income[keep], expense[keep]
+    balance = np.cumsum(income - expense)
+    rows = [
+        BalanceRow(date.fromordinal(int(day)), float(i), float(e), float(b))
+        for day, i, e, b in zip(buckets, income, expense, balance)
+    ]
+    return rows, opening
+
+
+def limit_goal_spending(columns: Columns, category_ids, month_start: date, today: date) -> dict:
+    """{category_id: (gasto no mês corrente, gasto total)} das categorias pedidas."""
+    if not category_ids:
+        return {}
+    expense = _type_mask(columns, "expense")
+    in_month = expense & _period_mask(columns, month_start, today)
+    size = int(max(category_ids)) + 2
+    all_time = np.bincount(columns.category[expense], weights=columns.value[expense], minlength=size)
+    monthly = np.bincount(columns.category[in_month], weights=columns.value[in_month], minlength=size)
+    return {
+        category_id: (float(monthly[category_id + 1]), float(all_time[category_id + 1]))
+        for category_id in category_ids
+    }
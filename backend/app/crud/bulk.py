@@ -0,0 +1,378 @@
+# backend/app/crud/bulk.py
+# Operações em lote sobre transações: cada chamada é uma única transação do
+# banco, com INSERT/UPDATE/DELETE por conjunto (não linha a linha).
+
+import time
+from collections import defaultdict
+from datetime import date
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy import insert, update, delete, select, bindparam, func
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..database import write_queue
+from ..search_index import normalize_search_text
+from .category import get_category_by_name
+from .tagging import category_tagger
+from .rollup import record_transaction_changes, transaction_facts, apply_rollup_deltas
+from .versioning import bump_data_version
+from .transaction import compute_fingerprint, _filter_transactions
+
+# Máximo de transações por operação em lote
+BULK_MAX_ITEMS = 10000
+# Tamanho dos blocos de ids nas cláusulas IN
+_IN_CHUNK = 500
+# Transações lidas (e gravadas, com commit) por lote no re-tagging
+RETAG_BATCH_SIZE = 20000
+
+_transactions = models.Transaction.__table__
+
+# Consultas do re-tagging, compiladas uma vez (a lista de ids é expandida na execução)
+_RETAG_CHUNK = 2000
+_retag_totals = (
+    select(
+        _transactions.c.date, _transactions.c.type,
+        func.sum(_transactions.c.value), func.count(),
+    )
+    .where(
+        _transactions.c.id.in_(bindparam("ids", expanding=True)),
+        _transactions.c.category_id.is_(None),
+    )
+    .group_by(_transactions.c.date, _transactions.c.type)
+)
+_retag_update = (
+    update(_transactions)
+    .where(
+        _transactions.c.id.in_(bindparam("ids", expanding=True)),
+        _transactions.c.category_id.is_(None),
+    )
+    .values(category_id=bindparam("category_id"))
+)
+
+
+def _chunks(items, size: int = _IN_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _result(started: float, results: List[dict], affected: int):
+    return {
+        "results": results,
+        "affected": affected,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def _category_id_by_name(db: Session, name: Optional[str]) -> Optional[int]:
+    if not name:
+        return None
+    category = get_category_by_name(db, name=name)
+    if not category:
+        raise HTTPException(status_code=404, detail=f"Categoria '{name}' não encontrada")
+    return category.id
+
+
+def _select_ids(db: Session, selection: schemas.TransactionSelection) -> List[int]:
+    """Ids da seleção: a lista enviada (sem repetições) ou o resultado dos filtros."""
+    if selection.ids:
+        ids = list(dict.fromkeys(selection.ids))
+    elif selection.search or selection.type or selection.month_year:
+        query = _filter_transactions(
+            db,
+            db.query(models.Transaction.id),
+            selection.search, selection.type, selection.month_year,
+        )
+        ids = [row.id for row in query.order_by(models.Transaction.id).limit(BULK_MAX_ITEMS + 1)]
+    else:
+        raise HTTPException(status_code=400, detail="Informe ids ou ao menos um filtro")
+
+    if len(ids) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Seleção grande demais (máximo de {BULK_MAX_ITEMS} transações)",
+        )
+    return ids
+
+
+def _load_transactions(db: Session, ids: List[int]):
+    """{id: linha} com os campos usados em fingerprint e agregados."""
+    rows = {}
+    for chunk in _chunks(ids):
+        for row in db.query(
+            models.Transaction.id, models.Transaction.date,
+            models.Transaction.description, models.Transaction.value,
+            models.Transaction.type, models.Transaction.category_id,
+        ).filter(models.Transaction.id.in_(chunk)):
+            rows[row.id] = row
+    return rows
+
+
+def _taken_fingerprints(db: Session, fingerprints, ignore_ids=()):
+    """Fingerprints (do conjunto) já usados por transações fora de `ignore_ids`."""
+    ignore_ids = set(ignore_ids)
+    taken = set()
+    for chunk in _chunks(set(fingerprints)):
+        for row in db.query(models.Transaction.id, models.Transaction.fingerprint).filter(
+            models.Transaction.fingerprint.in_(chunk)
+        ):
+            if row.id not in ignore_ids:
+                taken.add(row.fingerprint)
+    return taken
+
+
+def bulk_create_transactions(db: Session, items: List[schemas.TransactionBulkItem]):
+    """
+    Cria várias transações com um INSERT em lote. Mesmas regras da entrada
+    rápida: categoria pelo nome ou auto-tagging, e o fingerprint só fica com
+    a primeira transação igual (repetições continuam permitidas).
+    """
+    started = time.perf_counter()
+    today = date.today()
+
+    names = {item.category_name for item in items if item.category_name}
+    category_ids = {}
+    for name in names:
+        category = get_category_by_name(db, name=name)
+        if category:
+            category_ids[name] = category.id
+    untagged = [i for i, item in enumerate(items) if item.category_name not in category_ids]
+    tagged = category_tagger.tag(db, [items[i].description for i in untagged])
+    suggested = dict(zip(untagged, tagged))
+
+    rows = []
+    for i, item in enumerate(items):
+        tx_date = item.date or today
+        description = item.description.strip()
+        tx_type = item.type.lower().strip()
+        rows.append({
+            "date": tx_date, "description": description, "value": item.value,
+            "type": tx_type, "account": item.account,
+            "category_id": category_ids.get(item.category_name, suggested.get(i)),
+            "fingerprint": compute_fingerprint(tx_date, description, item.value, tx_type),
+        })
+
+    taken = _taken_fingerprints(db, (row["fingerprint"] for row in rows))
+    for row in rows:
+        if row["fingerprint"] in taken:
+            row["fingerprint"] = None
+        else:
+            taken.add(row["fingerprint"])
+
+    new_ids = db.execute(
+        insert(models.Transaction).returning(
+            models.Transaction.id, sort_by_parameter_order=True
+        ),
+        rows,
+    ).scalars().all()
+    record_transaction_changes(db, added=map(transaction_facts, rows))
+    bump_data_version(db)
+    db.commit()
+
+    results = [
+        {"index": i, "id": new_id, "status": "created"} for i, new_id in enumerate(new_ids)
+    ]
+    return _result(started, results, len(new_ids))
+
+
+def bulk_update_transactions(
+    db: Session,
+    selection: schemas.TransactionSelection,
+    changes: schemas.TransactionBulkChanges,
+):
+    """
+    Aplica as mesmas alterações a todas as transações da seleção: um UPDATE
+    por bloco de ids, mais um UPDATE em lote dos fingerprints quando data,
+    descrição, valor ou tipo mudam. Agregados e índice de busca acompanham.
+    """
+    started = time.perf_counter()
+    fields = changes.model_dump(exclude_unset=True)
+    if not fields:
+        raise HTTPException(status_code=400, detail="Nenhuma alteração informada")
+
+    values = {}
+    if "category_name" in fields:
+        values["category_id"] = _category_id_by_name(db, fields.pop("category_name"))
+    for key, value in fields.items():
+        if value is None:
+            continue  # Mesmo critério do PUT: None não altera o campo
+        values[key] = value.lower().strip() if key == "type" else value
+    if "description" in values:
+        values["description"] = values["description"].strip()
+        values["search_text"] = normalize_search_text(values["description"])
+    if not values:
+        raise HTTPException(status_code=400, detail="Nenhuma alteração informada")
+
+    ids = _select_ids(db, selection)
+    current = _load_transactions(db, ids)
+    found = [tx_id for tx_id in ids if tx_id in current]
+
+    refingerprint = bool({"date", "description", "value", "type"} & set(values))
+    if refingerprint:
+        # Libera os fingerprints antigos antes de gravar os novos (índice único)
+        values["fingerprint"] = None
+
+    for chunk in _chunks(found):
+        db.execute(update(_transactions).where(_transactions.c.id.in_(chunk)).values(**values))
+
+    added, removed = [], []
+    new_fingerprints = {}
+    for tx_id in found:
+        old = current[tx_id]
+        new = {
+            "date": values.get("date", old.date),
+            "description": values.get("description", old.description),
+            "value": values.get("value", old.value),
+            "type": values.get("type", old.type),
+            "category_id": values.get("category_id", old.category_id),
+        }
+        removed.append(transaction_facts(old))
+        added.append(transaction_facts(new))
+        if refingerprint:
+            new_fingerprints[tx_id] = compute_fingerprint(
+                new["date"], new["description"], new["value"], new["type"]
+            )
+
+    if new_fingerprints:
+        taken = _taken_fingerprints(db, new_fingerprints.values(), ignore_ids=found)
+        params = []
+        for tx_id, fingerprint in new_fingerprints.items():
+            if fingerprint not in taken:
+                taken.add(fingerprint)
+                params.append({"row_id": tx_id, "fp": fingerprint})
+        if params:
+            db.execute(
+                update(_transactions)
+                .where(_transactions.c.id == bindparam("row_id"))
+                .values(fingerprint=bindparam("fp")),
+                params,
+            )
+
+    record_transaction_changes(db, added=added, removed=removed)
+    bump_data_version(db)
+    db.commit()
+
+    results = [
+        {"id": tx_id, "status": "updated" if tx_id in current else "not_found"}
+        for tx_id in ids
+    ]
+    return _result(started, results, len(found))
+
+
+def bulk_recategorize_transactions(
+    db: Session,
+    selection: schemas.TransactionSelection,
+    category_name: Optional[str],
+):
+    """Troca a categoria da seleção (None remove a categoria)."""
+    changes = schemas.TransactionBulkChanges(category_name=category_name)
+    return bulk_update_transactions(db, selection, changes)
+
+
+def bulk_delete_transactions(db: Session, selection: schemas.TransactionSelection):
+    """Apaga a seleção com DELETE por bloco de ids, atualizando os agregados."""
+    started = time.perf_counter()
+    ids = _select_ids(db, selection)
+    current = _load_transactions(db, ids)
+
+    for chunk in _chunks(current):
+        db.execute(delete(_transactions).where(_transactions.c.id.in_(chunk)))
+    record_transaction_changes(db, removed=map(transaction_facts, current.values()))
+    bump_data_version(db)
+    db.commit()
+
+    results = [
+        {"id": tx_id, "status": "deleted" if tx_id in current else "not_found"}
+        for tx_id in ids
+    ]
+    return _result(started, results, len(current))
+
+
+def retag_uncategorized_transactions(
+    db: Session,
+    search: Optional[str] = None,
+    type: Optional[str] = None,
+    month_year: Optional[str] = None,
+    dry_run: bool = False,
+    batch_size: int = RETAG_BATCH_SIZE,
+):
+    """
+    Aplica as palavras-chave das categorias às transações sem categoria (todas
+    ou as dos filtros), em lotes por id. Cada lote grava com um UPDATE por
+    categoria e bloco de ids, atualiza os agregados e faz commit. Com
+    dry_run=True nada é gravado: só conta quantas transações cada categoria levaria.
+    """
+    started = time.perf_counter()
+    claimed = defaultdict(int)
+    scanned = 0
+    last_id = 0
+
+    while True:
+        query = _filter_transactions(
+            db,
+            db.query(models.Transaction.id, models.Transaction.description),
+            search, type, month_year,
+        )
+        query = (
+            query.filter(
+                models.Transaction.category_id.is_(None),
+                models.Transaction.id > last_id,
+            )
+            .order_by(models.Transaction.id)
+            .limit(batch_size)
+        )
+        # Tuplas direto do Core: sem o custo de montar linhas do ORM
+        batch = db.connection().execute(query.statement).all()
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        scanned += len(batch)
+
+        by_category = defaultdict(list)
+        for (tx_id, _), category_id in zip(batch, category_tagger.tag(db, [row[1] for row in batch])):
+            if category_id is not None:
+                by_category[category_id].append(tx_id)
+        for category_id, ids in by_category.items():
+            claimed[category_id] += len(ids)
+        if dry_run or not by_category:
+            continue
+
+        # Cada lote grava com a sua vez na fila de escrita, como escrita de
+        # fundo (as escritas das requisições passam na frente entre os lotes)
+        with write_queue.slot(background=True):
+            # A gravação começa numa transação nova, já com a vez; as consultas
+            # só pegam quem continua sem categoria (outra escrita pode ter vindo antes)
+            db.commit()
+            # Deltas dos agregados somados no banco e UPDATE por categoria, em blocos de ids
+            conn = db.connection()
+            daily = defaultdict(lambda: [0.0, 0])
+            for category_id, ids in by_category.items():
+                for chunk in _chunks(ids, _RETAG_CHUNK):
+                    for tx_date, tx_type, total, count in conn.execute(_retag_totals, {"ids": chunk}):
+                        for key, sign in (((tx_date, tx_type, None), -1), ((tx_date, tx_type, category_id), 1)):
+                            daily[key][0] += sign * total
+                            daily[key][1] += sign * count
+                    conn.execute(_retag_update, {"ids": chunk, "category_id": category_id})
+            apply_rollup_deltas(db, daily)
+            bump_data_version(db)
+            db.commit()
+
+    names = dict(
+        db.query(models.Category.id, models.Category.name).filter(
+            models.Category.id.in_(list(claimed))
+        )
+    ) if claimed else {}
+    categories = sorted(
+        (
+            {"category_id": cid, "category_name": names.get(cid), "count": count}
+            for cid, count in claimed.items()
+        ),
+        key=lambda item: -item["count"],
+    )
+    return {
+        "dry_run": dry_run,
+        "scanned": scanned,
+        "matched": sum(claimed.values()),
+        "categories": categories,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
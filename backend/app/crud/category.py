@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
-import re
 from .. import models, schemas
+from .tagging import category_tagger
+from .versioning import bump_data_version, CATEGORIES_SCOPE
 
 def get_category_by_name(db: Session, name: str):
     return db.query(models.Category).filter(models.Category.name == name).first()
@@ -15,22 +16,17 @@ def create_category(db: Session, category: schemas.CategoryCreate):
         parent_id=category.parent_id,
     )
     db.add(db_category)
+    bump_data_version(db, CATEGORIES_SCOPE)
     db.commit()
+    category_tagger.invalidate()
     db.refresh(db_category)
     return db_category
 
 def find_category_by_keyword(db: Session, description: str):
-    categories = db.query(models.Category).all()
-    description_lower = description.lower()
-    for category in categories:
-        if category.keywords:
-            keywords = [
-                kw.strip().lower() for kw in re.split(r"[;,]", category.keywords)
-            ]
-            for kw in keywords:
-                if kw and kw in description_lower:
-                    return category
-    return None
+    category_id = category_tagger.tag(db, [description])[0]
+    if category_id is None:
+        return None
+    return get_category_by_id(db, category_id)
 
 def get_category_by_id(db: Session, category_id: int):
     return db.query(models.Category).filter(models.Category.id == category_id).first()
@@ -40,7 +36,9 @@ def delete_category(db: Session, category_id: int):
     if db_category is None:
         return None
     db.delete(db_category)
+    bump_data_version(db, CATEGORIES_SCOPE)
     db.commit()
+    category_tagger.invalidate()
     return db_category
 
 
@@ -68,6 +66,8 @@ def update_category(
             setattr(db_category, key, value)
 
     # Salva e retorna
+    bump_data_version(db, CATEGORIES_SCOPE)
     db.commit()
+    category_tagger.invalidate()
     db.refresh(db_category)
     return db_category
\ No newline at end of file
@@ -1,32 +1,53 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, cast, Date
 from datetime import date, timedelta
+import time
 from typing import Optional
 from .. import models, schemas
+from . import analytics
+from .downsample import lttb_indices
+from .transaction import get_recent_transactions
 
 
-def _get_kpis_for_period(
-    db: Session, start_date: Optional[date], end_date: Optional[date]
-):
-    query = db.query(
-        models.Transaction.type, func.sum(models.Transaction.value).label("total")
-    )
+# Todas as leituras do dashboard usam o agregado diário (daily_totals), cujo
+# tamanho depende do número de dias e não do número de transações.
+def _filter_period(query, start_date: Optional[date], end_date: Optional[date]):
     if start_date:
-        query = query.filter(models.Transaction.date >= start_date)
+        query = query.filter(models.DailyTotal.date >= start_date)
     if end_date:
-        query = query.filter(models.Transaction.date <= end_date)
+        query = query.filter(models.DailyTotal.date <= end_date)
+    return query
 
-    results = query.group_by(models.Transaction.type).all()
 
-    kpis = {"total_income": 0.0, "total_expense": 0.0, "total_investment": 0.0}
-    for r in results:
-        if r.type == "income":
-            kpis["total_income"] = r.total or 0.0
-        elif r.type == "expense":
-            kpis["total_expense"] = r.total or 0.0
-        elif r.type == "investment":
-            kpis["total_investment"] = r.total or 0.0
+# Cada leitura tem duas partes, para as rotas async: load_* só usa o banco
+# (roda no greenlet da AsyncSession) e build_* só faz contas (NumPy, LTTB,
+# montagem; roda no threadpool). No motor em memória, o load é a leitura de
+# columnar_analytics e o build monta as colunas e responde a partir delas.
+# As funções get_* (CLI, testes) fazem as duas em sequência.
 
+def _analytics_columns(loaded: dict, columns=None):
+    """Colunas do motor em memória para o build (as do bundle, se já montadas)."""
+    if columns is not None:
+        return columns
+    return analytics.columnar_analytics.columns(loaded["analytics"])
+
+
+def _totals_by_type(db: Session, start_date: Optional[date], end_date: Optional[date]):
+    query = db.query(
+        models.DailyTotal.type, func.sum(models.DailyTotal.total).label("total")
+    )
+    query = _filter_period(query, start_date, end_date)
+
+    results = query.group_by(models.DailyTotal.type).all()
+    return {r.type: r.total or 0.0 for r in results}
+
+
+def _kpis(totals: dict):
+    kpis = {
+        "total_income": totals.get("income", 0.0),
+        "total_expense": totals.get("expense", 0.0),
+        "total_investment": totals.get("investment", 0.0),
+    }
     kpis["balance"] = kpis["total_income"] - kpis["total_expense"]
     return kpis
 
@@ -39,26 +60,43 @@ def _calculate_percentage_change(current: float, previous: float) -> float:
     return round(((current - previous) / previous) * 100, 2)
 
 
-def get_dashboard_kpis(
-    db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None
+def load_dashboard_kpis(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    analytics_read=None,
 ):
-    current_kpis = _get_kpis_for_period(db, start_date, end_date)
-    previous_kpis = {
-        "total_income": 0.0,
-        "total_expense": 0.0,
-        "total_investment": 0.0,
-        "balance": 0.0,
-    }
-
+    periods = [(start_date, end_date)]
     if start_date and end_date:
         try:
             period_duration = end_date - start_date
             prev_end_date = start_date - timedelta(days=1)
             prev_start_date = prev_end_date - period_duration
-            previous_kpis = _get_kpis_for_period(db, prev_start_date, prev_end_date)
+            periods.append((prev_start_date, prev_end_date))
         except Exception as e:
             print(f"Erro ao calcular período anterior: {e}")
 
+    if analytics.ANALYTICS_ENGINE == "memory":
+        read = analytics_read or analytics.columnar_analytics.read(db)
+        return {"periods": periods, "analytics": read}
+    return {
+        "periods": periods,
+        "totals": [_totals_by_type(db, start, end) for start, end in periods],
+    }
+
+
+def build_dashboard_kpis(loaded: dict, columns=None):
+    if "analytics" in loaded:
+        columns = _analytics_columns(loaded, columns)
+        totals = [
+            analytics.totals_by_type(columns, start, end) for start, end in loaded["periods"]
+        ]
+    else:
+        totals = loaded["totals"]
+
+    current_kpis = _kpis(totals[0])
+    previous_kpis = _kpis(totals[1]) if len(totals) > 1 else _kpis({})
+
     change_percentages = {
         "income_change_percentage": _calculate_percentage_change(
             current_kpis["total_income"], previous_kpis["total_income"]
@@ -76,99 +114,293 @@ def get_dashboard_kpis(
     return schemas.DashboardKPIs(**current_kpis, **change_percentages)
 
 
-def get_expenses_by_category(
+def get_dashboard_kpis(
     db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None
 ):
+    return build_dashboard_kpis(load_dashboard_kpis(db, start_date, end_date))
+
+
+def category_names(db: Session) -> dict:
+    """{id: nome} de todas as categorias (para o gasto por categoria em memória)."""
+    return dict(db.query(models.Category.id, models.Category.name))
+
+
+def category_expenses_from_memory(columns, names: dict, start_date, end_date) -> dict:
+    """
+    Gasto por nome de categoria pelo motor em memória (ids de categorias que
+    não existem mais somam em None, como no LEFT JOIN da versão SQL).
+    """
+    totals = analytics.expenses_by_category_id(columns, start_date, end_date)
+    by_name = {}
+    for category_id, total in totals.items():
+        name = names.get(category_id)
+        by_name[name] = by_name.get(name, 0.0) + total
+    return by_name
+
+
+def load_expenses_by_category(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    analytics_read=None,
+):
+    if analytics.ANALYTICS_ENGINE == "memory":
+        return {
+            "period": (start_date, end_date),
+            "analytics": analytics_read or analytics.columnar_analytics.read(db),
+            "category_names": category_names(db),
+        }
+
     query = (
         db.query(
             models.Category.name,
-            func.sum(models.Transaction.value).label("total_value"),
+            func.sum(models.DailyTotal.total).label("total_value"),
         )
-        .select_from(models.Transaction)
+        .select_from(models.DailyTotal)
         .join(
             models.Category,
-            models.Transaction.category_id == models.Category.id,
+            models.DailyTotal.category_id == models.Category.id,
             isouter=True,
         )
-        .filter(models.Transaction.type == "expense")
+        .filter(models.DailyTotal.type == "expense")
     )
+    query = _filter_period(query, start_date, end_date)
+    return {"rows": query.group_by(models.Category.name).all()}
 
-    if start_date:
-        query = query.filter(models.Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(models.Transaction.date <= end_date)
-
-    results = query.group_by(models.Category.name).all()
-    chart_data = []
-    for r in results:
-        chart_data.append(
-            schemas.CategoryExpense(
-                name=r.name if r.name else "Sem Categoria", value=r.total_value or 0.0
-            )
+
+def build_expenses_by_category(loaded: dict, columns=None):
+    if "analytics" in loaded:
+        by_name = category_expenses_from_memory(
+            _analytics_columns(loaded, columns), loaded["category_names"], *loaded["period"]
         )
-    return chart_data
+        return [
+            {"name": name if name else "Sem Categoria", "value": total}
+            for name, total in sorted(
+                by_name.items(), key=lambda item: (item[0] is not None, item[0] or "")
+            )
+        ]
 
+    # Já no formato de schemas.CategoryExpense (dicts, sem validar por linha)
+    return [
+        {"name": r.name if r.name else "Sem Categoria", "value": float(r.total_value or 0.0)}
+        for r in loaded["rows"]
+    ]
 
-def get_balance_over_time(
+
+def get_expenses_by_category(
     db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None
 ):
-    # Subqueries para agrupar por dia
-    income_sub = (
+    return build_expenses_by_category(load_expenses_by_category(db, start_date, end_date))
+
+
+def _date_bucket(db: Session, column, granularity: str):
+    """Trunca a data para o início do dia/semana (segunda)/mês, conforme o banco."""
+    if granularity == "day":
+        return column
+    if db.get_bind().dialect.name == "sqlite":
+        if granularity == "week":
+            return func.date(column, "weekday 0", "-6 days", type_=Date)
+        return func.date(column, "start of month", type_=Date)
+    return cast(func.date_trunc(granularity, column), Date)
+
+
+def _opening_balance(db: Session, start_date: Optional[date]) -> float:
+    """Saldo (receitas - despesas) acumulado antes do início do período."""
+    if not start_date:
+        return 0.0
+    opening = (
         db.query(
-            models.Transaction.date,
-            func.sum(models.Transaction.value).label("total_income"),
+            func.sum(
+                case(
+                    (models.DailyTotal.type == "income", models.DailyTotal.total),
+                    (models.DailyTotal.type == "expense", -models.DailyTotal.total),
+                    else_=0,
+                )
+            )
         )
-        .filter(models.Transaction.type == "income")
-        .group_by(models.Transaction.date)
-        .subquery()
+        .filter(models.DailyTotal.date < start_date)
+        .scalar()
     )
+    return opening or 0.0
 
-    expense_sub = (
-        db.query(
-            models.Transaction.date,
-            func.sum(models.Transaction.value).label("total_expense"),
+
+def load_balance_over_time(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: str = "day",
+    max_points: Optional[int] = None,
+    analytics_read=None,
+):
+    loaded = {
+        "period": (start_date, end_date),
+        "granularity": granularity,
+        "max_points": max_points,
+    }
+    if analytics.ANALYTICS_ENGINE == "memory":
+        loaded["analytics"] = analytics_read or analytics.columnar_analytics.read(db)
+    else:
+        loaded["rows"], loaded["opening_balance"] = _balance_rows(
+            db, start_date, end_date, granularity
         )
-        .filter(models.Transaction.type == "expense")
-        .group_by(models.Transaction.date)
-        .subquery()
-    )
+    return loaded
 
-    # --- CORREÇÃO PARA POSTGRESQL ---
-    # Adicionamos func.max() ao redor dos valores das subqueries.
-    # Como estamos agrupando por data, e a subquery tem apenas 1 valor por data,
-    # o MAX vai pegar esse único valor corretamente, satisfazendo a regra do Group By.
-    query = (
-        db.query(
-            models.Transaction.date,
-            func.max(func.coalesce(income_sub.c.total_income, 0)).label("income"),
-            func.max(func.coalesce(expense_sub.c.total_expense, 0)).label("expense"),
+
+def build_balance_over_time(loaded: dict, columns=None):
+    if "analytics" in loaded:
+        rows, opening_balance = analytics.balance_over_time(
+            _analytics_columns(loaded, columns), *loaded["period"], loaded["granularity"]
         )
-        .outerjoin(income_sub, models.Transaction.date == income_sub.c.date)
-        .outerjoin(expense_sub, models.Transaction.date == expense_sub.c.date)
+    else:
+        rows, opening_balance = loaded["rows"], loaded["opening_balance"]
+
+    max_points = loaded["max_points"]
+    if max_points and len(rows) > max_points:
+        keep = lttb_indices(
+            [row.bucket.toordinal() for row in rows],
+            [row.balance for row in rows],
+            max_points,
+        )
+        rows = [rows[i] for i in keep]
+
+    # Já no formato de schemas.BalanceOverTimePoint (dicts, sem validar por ponto)
+    return [
+        {
+            "date": row.bucket.isoformat(),
+            "income": float(row.income),
+            "expense": float(row.expense),
+            "balance": float(opening_balance + row.balance),
+        }
+        for row in rows
+    ]
+
+
+def get_balance_over_time(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: str = "day",
+    max_points: Optional[int] = None,
+):
+    """
+    Evolução do saldo por dia/semana/mês numa única agregação: o saldo acumulado
+    vem de SUM() OVER (ORDER BY ...) e parte do saldo anterior a `start_date`.
+    Com `max_points`, a série é reduzida por LTTB antes de virar resposta.
+    """
+    return build_balance_over_time(
+        load_balance_over_time(db, start_date, end_date, granularity, max_points)
     )
 
-    if start_date:
-        query = query.filter(models.Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(models.Transaction.date <= end_date)
 
-    daily_summary = (
-        query.group_by(models.Transaction.date).order_by(models.Transaction.date).all()
+def _balance_rows(db: Session, start_date, end_date, granularity: str):
+    bucket = _date_bucket(db, models.DailyTotal.date, granularity)
+    income = func.sum(
+        case((models.DailyTotal.type == "income", models.DailyTotal.total), else_=0)
+    )
+    expense = func.sum(
+        case((models.DailyTotal.type == "expense", models.DailyTotal.total), else_=0)
+    )
+    query = db.query(
+        bucket.label("bucket"),
+        income.label("income"),
+        expense.label("expense"),
+        func.sum(income - expense).over(order_by=bucket).label("balance"),
     )
+    query = _filter_period(query, start_date, end_date)
 
-    chart_data = []
-    running_balance = 0.0
-
-    for day in daily_summary:
-        # O SQLAlchemy retorna os labels definidos
-        daily_net = day.income - day.expense
-        running_balance += daily_net
-        chart_data.append(
-            schemas.BalanceOverTimePoint(
-                date=day.date.isoformat(),
-                income=day.income,
-                expense=day.expense,
-                balance=running_balance,
-            )
+    rows = query.group_by(bucket).order_by(bucket).all()
+    return rows, _opening_balance(db, start_date)
+
+
+def _timed(timings: dict, section: str, fn, *args, **kwargs):
+    # Soma ao que a seção já custou (o load e o build contam juntos)
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = (time.perf_counter() - started) * 1000
+    timings[section] = round(timings.get(section, 0.0) + elapsed, 3)
+    return result
+
+
+def load_dashboard_bundle(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: str = "day",
+    max_points: Optional[int] = None,
+    recent_limit: int = 5,
+    timings: Optional[dict] = None,
+):
+    """
+    Parte de banco do bundle, com a mesma sessão (uma conexão) e os mesmos
+    filtros para todas as seções. No motor em memória, uma leitura só de
+    columnar_analytics serve as três seções analíticas.
+    """
+    timings = {} if timings is None else timings
+    read = None
+    if analytics.ANALYTICS_ENGINE == "memory":
+        read = _timed(timings, "analytics", analytics.columnar_analytics.read, db)
+    return {
+        "analytics": read,
+        "kpis": _timed(
+            timings, "kpis", load_dashboard_kpis, db, start_date, end_date,
+            analytics_read=read,
+        ),
+        "expenses_by_category": _timed(
+            timings, "expenses_by_category", load_expenses_by_category, db,
+            start_date, end_date, analytics_read=read,
+        ),
+        "balance_over_time": _timed(
+            timings, "balance_over_time", load_balance_over_time, db, start_date,
+            end_date, granularity, max_points, analytics_read=read,
+        ),
+        "recent_transactions": _timed(
+            timings, "recent_transactions", get_recent_transactions, db,
+            start_date=start_date, end_date=end_date, limit=recent_limit,
+        ),
+    }
+
+
+def build_dashboard_bundle(loaded: dict, timings: Optional[dict] = None):
+    """
+    Monta as seções a partir de load_dashboard_bundle (as colunas em memória
+    uma vez só). `timings`, se passado, recebe quanto cada seção custou (ms),
+    somando load e build. Fica fora do conteúdo, que vai para o cache de respostas.
+    """
+    timings = {} if timings is None else timings
+    columns = None
+    if loaded["analytics"] is not None:
+        columns = _timed(
+            timings, "analytics", analytics.columnar_analytics.columns, loaded["analytics"]
         )
-    return chart_data
+    bundle = {
+        "kpis": _timed(timings, "kpis", build_dashboard_kpis, loaded["kpis"], columns),
+        "expenses_by_category": _timed(
+            timings, "expenses_by_category", build_expenses_by_category,
+            loaded["expenses_by_category"], columns,
+        ),
+        "balance_over_time": _timed(
+            timings, "balance_over_time", build_balance_over_time,
+            loaded["balance_over_time"], columns,
+        ),
+        "recent_transactions": loaded["recent_transactions"],
+    }
+    timings.pop("total", None)
+    timings["total"] = round(sum(timings.values()), 3)
+    return bundle
+
+
+def get_dashboard_bundle(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: str = "day",
+    max_points: Optional[int] = None,
+    recent_limit: int = 5,
+    timings: Optional[dict] = None,
+):
+    """Tudo o que a Home precisa numa chamada só (load + build do bundle)."""
+    timings = {} if timings is None else timings
+    loaded = load_dashboard_bundle(
+        db, start_date, end_date, granularity, max_points, recent_limit, timings
+    )
+    return build_dashboard_bundle(loaded, timings)
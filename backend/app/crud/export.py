@@ -0,0 +1,180 @@
+import csv
+import io
+import tempfile
+import orjson
+import openpyxl
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from .. import models
+from .transaction import _filter_transactions
+
+# pyarrow é opcional: sem ele, o formato parquet responde 400
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Linhas buscadas por vez no cursor do banco (e escritas por bloco na saída)
+EXPORT_BATCH_SIZE = 5000
+
+# Mesmos nomes aceitos pela importação, então o CSV/XLSX exportado pode ser reimportado
+EXPORT_COLUMNS = ["id", "date", "description", "value", "type", "account", "category_name"]
+
+# Linhas de dados por aba no XLSX (o Excel aceita 1.048.576, contando o cabeçalho)
+XLSX_MAX_ROWS = 1_048_575
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _export_batches(db: Session, search, type, month_year):
+    """
+    Executa a consulta com os filtros da tela de Lançamentos e devolve os blocos
+    de linhas (yield_per: o banco entrega EXPORT_BATCH_SIZE linhas por vez, sem
+    carregar o resultado inteiro na memória).
+    """
+    query = db.query(
+        models.Transaction.id,
+        models.Transaction.date,
+        models.Transaction.description,
+        models.Transaction.value,
+        models.Transaction.type,
+        models.Transaction.account,
+        models.Category.name.label("category_name"),
+    ).outerjoin(
+        models.Category,
+        models.Transaction.category_id == models.Category.id,
+    )
+    query = _filter_transactions(db, query, search, type, month_year)
+    query = query.order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
+    # Core direto (tuplas, sem a camada de carregamento do ORM), que domina o
+    # custo quando são milhões de linhas
+    result = db.connection().execute(
+        query.statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    return result.partitions()
+
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode("utf-8")
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(batches):
+    for batch in batches:
+        yield b"".join(
+            orjson.dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in batch
+        )
+
+
+def _xlsx_chunks(batches):
+    # O XLSX é um zip e só fica pronto no fim: as linhas vão para um arquivo
+    # temporário (modo write_only, memória constante) e o arquivo é enviado aos pedaços
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet, sheet_rows = None, XLSX_MAX_ROWS
+    for batch in batches:
+        for row in batch:
+            # Acima do limite de linhas do Excel, continua numa nova aba
+            if sheet_rows == XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Transações {len(workbook.worksheets) + 1}")
+                sheet.append(EXPORT_COLUMNS)
+                sheet_rows = 0
+            sheet.append(tuple(row))
+            sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet("Transações 1").append(EXPORT_COLUMNS)
+    with tempfile.TemporaryFile() as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while chunk := spool.read(1024 * 1024):
+            yield chunk
+
+
+class _ParquetSink(io.RawIOBase):
+    """Arquivo de destino do ParquetWriter que guarda os bytes até serem enviados."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_chunks(batches):
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        ("description", pa.string()),
+        ("value", pa.float64()),
+        ("type", pa.string()),
+        ("account", pa.string()),
+        ("category_name", pa.string()),
+    ])
+    sink = _ParquetSink()
+    # Um row group por bloco do cursor: cada bloco sai assim que é escrito
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+_WRITERS = {
+    "csv": _csv_chunks,
+    "ndjson": _ndjson_chunks,
+    "xlsx": _xlsx_chunks,
+    "parquet": _parquet_chunks,
+}
+
+
+def export_transactions(
+    db: Session,
+    format: str = "csv",
+    search: Optional[str] = None,
+    type: Optional[str] = None,
+    month_year: Optional[str] = None,
+):
+    """
+    Exporta as transações filtradas (mesmos filtros de get_all_transactions,
+    sem paginação) como um gerador de bytes no formato pedido. A consulta já
+    é executada aqui, então erros aparecem antes de a resposta começar.
+    """
+    if format not in _WRITERS:
+        raise HTTPException(status_code=400, detail=f"Formato de exportação inválido: {format}")
+    if format == "parquet" and pa is None:
+        raise HTTPException(
+            status_code=400, detail="Exportação em parquet requer o pacote pyarrow"
+        )
+    batches = _export_batches(db, search, type, month_year)
+    return _WRITERS[format](batches)
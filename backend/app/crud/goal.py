@@ -1,11 +1,44 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, and_, update, insert, bindparam
 from datetime import date
-from typing import Optional
+from typing import Optional, List
+from collections import defaultdict
 from fastapi import HTTPException
 from .. import models, schemas
+from . import analytics
 
-def get_goals_page_data(db: Session, filter_type: Optional[str] = None):
+def _limit_goal_spending(db: Session, category_ids, month_start: date, today: date):
+    """
+    Gasto (despesas) por categoria em UMA consulta ao agregado diário:
+    {category_id: (gasto no mês corrente, gasto total)}.
+    """
+    if not category_ids:
+        return {}
+    if analytics.ANALYTICS_ENGINE == "memory":
+        columns = analytics.columnar_analytics.snapshot(db)
+        return analytics.limit_goal_spending(columns, category_ids, month_start, today)
+    in_month = and_(models.DailyTotal.date >= month_start, models.DailyTotal.date <= today)
+    rows = (
+        db.query(
+            models.DailyTotal.category_id,
+            func.sum(case((in_month, models.DailyTotal.total), else_=0.0)).label("monthly"),
+            func.sum(models.DailyTotal.total).label("all_time"),
+        )
+        .filter(
+            models.DailyTotal.type == "expense",
+            models.DailyTotal.category_id.in_(list(category_ids)),
+        )
+        .group_by(models.DailyTotal.category_id)
+        .all()
+    )
+    return {row.category_id: (row.monthly or 0.0, row.all_time or 0.0) for row in rows}
+
+
+def load_goals_page(db: Session, filter_type: Optional[str] = None):
+    """
+    Parte de banco da página de metas (só consultas; build_goals_page monta).
+    No motor em memória o gasto das metas de limite fica para o build.
+    """
     query = db.query(
         models.Goal, models.Category.name.label("category_name")
     ).outerjoin(models.Category, models.Goal.category_id == models.Category.id)
@@ -18,6 +51,27 @@ def get_goals_page_data(db: Session, filter_type: Optional[str] = None):
     all_goals = query.order_by(models.Goal.id).all()
     today = date.today()
     first_day_of_month = today.replace(day=1)
+    limit_categories = {
+        goal.category_id for goal, _ in all_goals if goal.type == "limit" and goal.category_id
+    }
+    loaded = {
+        "goals": all_goals,
+        "limit_categories": limit_categories,
+        "month_start": first_day_of_month,
+        "today": today,
+    }
+    if analytics.ANALYTICS_ENGINE == "memory" and limit_categories:
+        loaded["analytics"] = analytics.columnar_analytics.read(db)
+    else:
+        # Gasto de todas as metas de limite de uma vez (em vez de uma consulta por meta)
+        loaded["spending"] = _limit_goal_spending(
+            db, limit_categories, first_day_of_month, today
+        )
+    return loaded
+
+
+def build_goals_page(loaded: dict):
+    all_goals = loaded["goals"]
     summary = {
         "total_saved_current": 0.0, "total_saved_target": 0.0,
         "total_limit_spent": 0.0, "total_limit_target": 0.0,
@@ -25,6 +79,16 @@ def get_goals_page_data(db: Session, filter_type: Optional[str] = None):
     }
     processed_goals = []
 
+    if "analytics" in loaded:
+        spending = analytics.limit_goal_spending(
+            analytics.columnar_analytics.columns(loaded["analytics"]),
+            loaded["limit_categories"],
+            loaded["month_start"],
+            loaded["today"],
+        )
+    else:
+        spending = loaded["spending"]
+
     for goal_tuple in all_goals:
         goal: models.Goal = goal_tuple[0]
         category_name: str = goal_tuple[1]
@@ -37,36 +101,28 @@ def get_goals_page_data(db: Session, filter_type: Optional[str] = None):
             summary["saving_goals_count"] += 1
         elif goal.type == "limit":
             if goal.category_id:
-                q_start_date = first_day_of_month if goal.period == "monthly" else None
-                q_end_date = today if goal.period == "monthly" else None
-                q = db.query(func.sum(models.Transaction.value)).filter(
-                    models.Transaction.type == "expense",
-                    models.Transaction.category_id == goal.category_id,
-                )
-                if q_start_date:
-                    q = q.filter(models.Transaction.date >= q_start_date)
-                if q_end_date:
-                    q = q.filter(models.Transaction.date <= q_end_date)
-                spent = q.scalar() or 0.0
-                progress_value = spent
+                monthly_spent, total_spent = spending.get(goal.category_id, (0.0, 0.0))
+                progress_value = monthly_spent if goal.period == "monthly" else total_spent
             if goal.period == "monthly":
                 summary["total_limit_spent"] += progress_value
                 summary["total_limit_target"] += goal.target_amount
                 summary["limit_goals_count"] += 1
 
         percentage = (progress_value / goal.target_amount) * 100 if goal.target_amount > 0 else 0.0
-        processed_goals.append(
-            schemas.Goal(
-                id=goal.id, name=goal.name, type=goal.type,
-                target_amount=goal.target_amount, current_amount=goal.current_amount,
-                period=goal.period, deadline=goal.deadline, category_id=goal.category_id,
-                category_name=category_name or (goal.type.capitalize()),
-                progress_value=progress_value, progress_percentage=percentage,
-            )
-        )
+        # Já no formato de schemas.Goal (dict, sem validar por meta)
+        processed_goals.append({
+            "id": goal.id, "name": goal.name, "type": goal.type,
+            "target_amount": goal.target_amount, "current_amount": goal.current_amount,
+            "period": goal.period, "deadline": goal.deadline, "category_id": goal.category_id,
+            "category_name": category_name or (goal.type.capitalize()),
+            "progress_value": progress_value, "progress_percentage": percentage,
+        })
     summary["active_goals_count"] = len(processed_goals)
     return {"summary": summary, "goals": processed_goals}
 
+def get_goals_page_data(db: Session, filter_type: Optional[str] = None):
+    return build_goals_page(load_goals_page(db, filter_type))
+
 def create_goal(db: Session, goal_data: schemas.GoalCreate):
     category_id = None
     if goal_data.category_id:
@@ -109,28 +165,85 @@ def delete_goal(db: Session, goal_id: int):
     db_goal = db.query(models.Goal).filter(models.Goal.id == goal_id).first()
     if not db_goal:
         raise HTTPException(status_code=404, detail="Meta não encontrada")
+    db.query(models.GoalContribution).filter(
+        models.GoalContribution.goal_id == goal_id
+    ).delete(synchronize_session=False)
     db.delete(db_goal)
     db.commit()
     return {"ok": True}
 
 
+def _check_saving_goals(db: Session, goal_ids):
+    """Garante que todas as metas existem e são de poupança (uma consulta)."""
+    types = dict(
+        db.query(models.Goal.id, models.Goal.type).filter(models.Goal.id.in_(list(goal_ids)))
+    )
+    missing = sorted(set(goal_ids) - set(types))
+    if missing:
+        detail = "Meta não encontrada" if len(missing) == 1 else f"Metas não encontradas: {missing}"
+        raise HTTPException(status_code=404, detail=detail)
+    if any(goal_type != "saving" for goal_type in types.values()):
+        raise HTTPException(status_code=400, detail="Aporte só é permitido para metas de poupança.")
+
+
 def add_contribution_to_goal(db: Session, goal_id: int, amount: float):
     """
-    Adiciona um valor (aporte) à meta de poupança (saving).
+    Adiciona um valor (aporte) à meta de poupança (saving): registra o aporte no
+    livro e soma no current_amount com um UPDATE atômico (sem ler-e-gravar, então
+    aportes simultâneos não se perdem).
     """
-    db_goal = db.query(models.Goal).filter(models.Goal.id == goal_id).first()
-    if not db_goal:
-        raise HTTPException(status_code=404, detail="Meta não encontrada")
+    db_goal = db.scalars(
+        update(models.Goal)
+        .where(models.Goal.id == goal_id, models.Goal.type == "saving")
+        .values(current_amount=models.Goal.current_amount + amount)
+        .returning(models.Goal)
+    ).first()
+    if db_goal is None:
+        # Nada atualizado: descobre o motivo para responder 404 ou 400
+        _check_saving_goals(db, [goal_id])
 
-    if db_goal.type != "saving":
-        raise HTTPException(status_code=400, detail="Aporte só é permitido para metas de poupança.")
-    
-    # Adiciona o valor atual ao valor existente
-    db_goal.current_amount += amount
-    
-    # Garante que o valor não ultrapasse o target (opcional, mas bom para evitar over-saving)
-    # db_goal.current_amount = min(db_goal.current_amount, db_goal.target_amount) 
-    
+    db.add(models.GoalContribution(goal_id=goal_id, amount=amount))
     db.commit()
     db.refresh(db_goal)
-    return db_goal
\ No newline at end of file
+    return db_goal
+
+
+def add_goal_contributions(db: Session, contributions: List[schemas.GoalContributionCreate]):
+    """
+    Aplica vários aportes (em uma ou mais metas) numa única transação: tudo ou
+    nada. Retorna as metas afetadas, já com o current_amount atualizado.
+    """
+    totals = defaultdict(float)
+    for contribution in contributions:
+        totals[contribution.goal_id] += contribution.amount
+    _check_saving_goals(db, totals)
+
+    goals_table = models.Goal.__table__
+    db.execute(
+        update(goals_table)
+        .where(goals_table.c.id == bindparam("goal_id"))
+        .values(current_amount=goals_table.c.current_amount + bindparam("amount")),
+        [{"goal_id": goal_id, "amount": amount} for goal_id, amount in totals.items()],
+    )
+    db.execute(
+        insert(models.GoalContribution),
+        [{"goal_id": c.goal_id, "amount": c.amount} for c in contributions],
+    )
+    db.commit()
+    return (
+        db.query(models.Goal)
+        .filter(models.Goal.id.in_(list(totals)))
+        .order_by(models.Goal.id)
+        .all()
+    )
+
+
+def get_goal_contributions(db: Session, goal_id: int, limit: int = 100):
+    """Últimos aportes de uma meta (mais recente primeiro)."""
+    return (
+        db.query(models.GoalContribution)
+        .filter(models.GoalContribution.goal_id == goal_id)
+        .order_by(models.GoalContribution.id.desc())
+        .limit(limit)
+        .all()
+    )
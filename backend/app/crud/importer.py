@@ -1,92 +1,483 @@
+import os
+import socket
+import warnings
+import numpy as np
 import pandas as pd
+import openpyxl
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import Session
 from io import BytesIO
+from datetime import datetime, timedelta, timezone
 from .. import models
-from .category import get_category_by_name, find_category_by_keyword
+from ..database import write_queue
+from .category import get_category_by_name
+from .tagging import category_tagger
+from .transaction import compute_fingerprint
+from .rollup import record_transaction_changes, transaction_facts
+from .versioning import bump_data_version
 
-def process_import_file(db: Session, file_content: bytes, file_name: str):
+# Quantidade de linhas lidas e gravadas por vez (um INSERT em lote por bloco)
+IMPORT_CHUNK_SIZE = 5000
+
+# Máximo de linhas rejeitadas detalhadas na resposta (o total é sempre contado)
+MAX_REJECTED_REPORT = 100
+
+# Validade do lease de um job: sem sinal de vida do processo dono por mais
+# que isso (segundos), o job pending/running é dado como interrompido
+IMPORT_JOB_LEASE_SECONDS = int(os.environ.get("IMPORT_JOB_LEASE_SECONDS", "300"))
+
+# Erro dos jobs que ficaram pela metade quando o processo parou
+INTERRUPTED_JOB_ERROR = (
+    "Importação interrompida: o servidor reiniciou antes de terminar. Os blocos "
+    "já gravados foram mantidos; importar o arquivo de novo pula as linhas repetidas."
+)
+
+COLUMN_MAPPING = {
+    "data": "date", "descrição": "description", "descricao": "description",
+    "valor": "value", "tipo": "type", "conta": "account", "categoria": "category_name",
+}
+REQUIRED_COLUMNS = ["date", "description", "value", "type"]
+
+
+def _normalize_column_names(columns) -> list:
+    normalized = (
+        pd.Index([str(c) if c is not None else "" for c in columns]).str.lower()
+        .str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("utf-8")
+    )
+    return [COLUMN_MAPPING.get(c, c) for c in normalized]
+
+
+def _has_required_columns(columns) -> bool:
+    return all(col in columns for col in REQUIRED_COLUMNS)
+
+
+def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = _normalize_column_names(df.columns)
+
+    if not _has_required_columns(df.columns):
+        raise ValueError(
+            f"O arquivo está faltando colunas obrigatórias. Precisa de: {REQUIRED_COLUMNS}"
+        )
+    return df
+
+
+def _iter_xlsx_chunks(source, chunk_size: int):
+    """
+    Lê o XLSX em modo read-only (linha a linha, só valores), todas as abas.
+    Abas sem as colunas obrigatórias (ex: um resumo) são ignoradas.
+    O índice de cada bloco segue a numeração do Excel (linha - 2), como no CSV.
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        found_sheet = False
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            columns = _normalize_column_names(header)
+            if not _has_required_columns(columns):
+                continue
+            found_sheet = True
+            width = len(columns)
+
+            batch, index = [], []
+            for position, row in enumerate(rows):
+                if all(v is None for v in row):
+                    continue
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                batch.append(row)
+                index.append(position)
+                if len(batch) >= chunk_size:
+                    yield _sheet_chunk(batch, columns, index, sheet.title)
+                    batch, index = [], []
+            if batch:
+                yield _sheet_chunk(batch, columns, index, sheet.title)
+
+        if not found_sheet:
+            raise ValueError(
+                f"O arquivo está faltando colunas obrigatórias. Precisa de: {REQUIRED_COLUMNS}"
+            )
+    finally:
+        workbook.close()
+
+
+def _sheet_chunk(batch: list, columns: list, index: list, sheet_name: str) -> pd.DataFrame:
+    chunk = pd.DataFrame.from_records(batch, columns=columns, index=index)
+    chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+    chunk.attrs["sheet"] = sheet_name
+    return chunk
+
+
+def _iter_chunks(file_content, file_name: str, chunk_size: int):
+    """
+    Lê o arquivo em blocos de `chunk_size` linhas, sem carregar tudo na memória.
+    `file_content` pode ser `bytes` ou um arquivo binário (ex: o upload em disco).
+    """
+    source = BytesIO(file_content) if isinstance(file_content, bytes) else file_content
     try:
         if file_name.endswith(".xlsx"):
-            df = pd.read_excel(BytesIO(file_content))
+            chunks = _iter_xlsx_chunks(source, chunk_size)
         else:
-            df = pd.read_csv(BytesIO(file_content))
+            chunks = (
+                _normalize_columns(chunk)
+                for chunk in pd.read_csv(source, chunksize=chunk_size)
+            )
+        yield from chunks
+    except ValueError:
+        raise
     except Exception as e:
         raise ValueError(f"Erro ao ler o arquivo> {e}")
 
-    column_mapping = {
-        "data": "date", "descrição": "description", "descricao": "description",
-        "valor": "value", "tipo": "type", "conta": "account", "categoria": "category_name",
-    }
-    df.columns = (
-        df.columns.str.lower()
-        .str.normalize("NFKD")
-        .str.encode("ascii", errors="ignore")
-        .str.decode("utf-8")
+
+# Limpeza de valores em BRL ("R$ 1.234,56" -> "1234.56") numa única passada
+_BRL_TRANSLATION = str.maketrans({
+    "R": None, "$": None, ".": None, " ": None, "\xa0": None, "\t": None, ",": ".",
+})
+
+
+def _parse_dates(column: pd.Series) -> pd.Series:
+    # ISO (AAAA-MM-DD, o formato da exportação) antes do dia/mês: com dayfirst,
+    # "2024-01-05" viraria 1º de maio
+    parsed = pd.to_datetime(column, errors="coerce", format="ISO8601")
+    retry = parsed.isna() & column.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(column[retry], dayfirst=True, errors="coerce")
+    # Formatos misturados no mesmo arquivo: só as sobras vão para o parser mais lento
+    retry = parsed.isna() & column.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(
+            column[retry].astype(str), dayfirst=True, errors="coerce", format="mixed"
+        )
+    return parsed.dt.date
+
+
+def _brl_to_float(strings: list) -> np.ndarray:
+    """
+    Converte textos em BRL para float limpando a coluna inteira numa string só.
+    Linhas inválidas viram NaN. Uma quebra de linha dentro de uma célula
+    desalinharia a string juntada, então nesse caso vai direto para o caminho lento.
+    """
+    cleaned = "\n".join(strings).translate(_BRL_TRANSLATION)
+    if "\r" not in cleaned and cleaned.count("\n") == len(strings) - 1:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)
+                values = np.fromstring(cleaned, sep="\n")
+            if len(values) == len(strings):
+                return values
+        except ValueError:
+            pass
+
+    # Algum valor inválido: volta para a conversão tolerante a erros
+    parts = cleaned.split("\n")
+    if len(parts) != len(strings):
+        parts = [s.translate(_BRL_TRANSLATION) for s in strings]
+    return pd.to_numeric(pd.Series(parts, dtype=object), errors="coerce").to_numpy(dtype=float)
+
+
+def _parse_values(column: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype(float)
+
+    # Só texto, sem células vazias (no pandas 3 a coluna str com NaN também é "string")
+    if column.notna().all() and pd.api.types.infer_dtype(column, skipna=False) == "string":
+        return pd.Series(_brl_to_float(column.tolist()), index=column.index)
+
+    # Números vindos já como número (ex: células do Excel) não passam pela limpeza de BRL
+    is_text = column.map(lambda v: isinstance(v, str))
+    values = pd.to_numeric(column.where(~is_text), errors="coerce").astype(float)
+    values[is_text] = _brl_to_float(column[is_text].tolist())
+    return values
+
+
+def _parse_unique(column: pd.Series, parser) -> pd.Series:
+    """
+    Aplica `parser` só aos valores distintos da coluna e espalha o resultado
+    de volta pelas linhas (datas e tipos se repetem muito em extratos).
+    """
+    codes, uniques = pd.factorize(column)
+    parsed = parser(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    result = pd.Series(
+        parsed.take(codes) if len(parsed) else None, index=column.index, dtype=object
     )
-    df = df.rename(columns=column_mapping)
+    return result.where(codes >= 0, None)
 
-    required_cols = ["date", "description", "value", "type"]
-    if not all(col in df.columns for col in required_cols):
-        raise ValueError(
-            f"O arquivo está faltando colunas obrigatórias. Precisa de: {required_cols}"
+
+def _parse_chunk(df: pd.DataFrame):
+    """
+    Converte as colunas inteiras de uma vez (data, valor, descrição, tipo).
+    Retorna o DataFrame só com as linhas válidas e a lista de linhas rejeitadas
+    com o motivo (o número da linha é o do arquivo, contando o cabeçalho).
+    """
+    dates = _parse_unique(df["date"], _parse_dates)
+    values = _parse_values(df["value"])
+    types = _parse_unique(
+        df["type"], lambda u: u.astype(str).str.lower().str.strip()
+    )
+
+    invalid_date = dates.isna()
+    invalid_value = values.isna() | ~np.isfinite(values.fillna(0))
+    invalid_type = types.isna() | (types == "")
+    valid = ~(invalid_date | invalid_value | invalid_type)
+
+    rejected = []
+    if not valid.all():
+        reasons = (
+            pd.Series("", index=df.index)
+            .mask(invalid_type, "tipo ausente")
+            .mask(invalid_value, "valor inválido")
+            .mask(invalid_date, "data inválida")
+        )
+        sheet = df.attrs.get("sheet")
+        for index, reason in reasons[~valid].items():
+            entry = {"row": int(index) + 2, "reason": reason}
+            if sheet:
+                entry["sheet"] = sheet
+            rejected.append(entry)
+
+    parsed = pd.DataFrame({
+        "date": dates[valid],
+        "description": df.loc[valid, "description"].fillna("").astype(str).str.strip(),
+        "value": values[valid],
+        "type": types[valid],
+        "account": df.loc[valid, "account"].astype(object).where(
+            df.loc[valid, "account"].notna(), None
+        ) if "account" in df.columns else None,
+        "category_name": df.loc[valid, "category_name"].astype(object).where(
+            df.loc[valid, "category_name"].notna(), None
+        ) if "category_name" in df.columns else None,
+    })
+    return parsed, rejected
+
+
+def _drop_duplicates(db: Session, parsed: pd.DataFrame):
+    """
+    Remove as linhas repetidas dentro do próprio bloco e as que já existem no banco
+    (uma única consulta por bloco, pelo índice único de fingerprint).
+    """
+    parsed = parsed.assign(fingerprint=[
+        compute_fingerprint(d, desc, v, t)
+        for d, desc, v, t in zip(
+            parsed["date"], parsed["description"], parsed["value"], parsed["type"]
+        )
+    ])
+    unique = parsed.drop_duplicates("fingerprint")
+    if unique.empty:
+        return unique, len(parsed)
+
+    existing = {
+        fp for (fp,) in db.query(models.Transaction.fingerprint).filter(
+            models.Transaction.fingerprint.in_(unique["fingerprint"].tolist())
+        )
+    }
+    new = unique[~unique["fingerprint"].isin(existing)]
+    return new, len(parsed) - len(new)
+
+
+def _build_chunk_rows(db: Session, parsed: pd.DataFrame, category_cache: dict):
+    parsed, skipped = _drop_duplicates(db, parsed)
+    records = parsed.to_dict("records")
+
+    # Cache por importação: o mesmo nome de categoria aparece em muitas linhas
+    category_ids = []
+    for row in records:
+        name = row["category_name"]
+        if name is not None and name not in category_cache:
+            category_obj = get_category_by_name(db, name=name)
+            category_cache[name] = category_obj.id if category_obj else None
+        category_ids.append(category_cache.get(name) if name is not None else None)
+
+    # Auto-tagging em lote só para as linhas sem categoria pelo nome
+    untagged = [i for i, category_id in enumerate(category_ids) if category_id is None]
+    tagged = category_tagger.tag(db, [records[i]["description"] for i in untagged])
+    for i, category_id in zip(untagged, tagged):
+        category_ids[i] = category_id
+
+    rows = [
+        {
+            "date": row["date"], "description": row["description"],
+            "value": row["value"], "type": row["type"],
+            "account": row["account"],
+            "category_id": category_id,
+            "fingerprint": row["fingerprint"],
+        }
+        for row, category_id in zip(records, category_ids)
+    ]
+    return rows, skipped
+
+
+def process_import_file(
+    db: Session, file_content, file_name: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE, on_progress=None,
+):
+    """
+    Importa um arquivo .csv/.xlsx bloco a bloco.
+    Cada bloco é gravado com um único INSERT em lote e confirmado em seguida,
+    então a memória usada não depende do tamanho do arquivo. A leitura e o
+    parse do bloco rodam fora da fila de escrita; só a gravação espera a vez.
+    `file_content` pode ser `bytes` ou um objeto de arquivo binário.
+    `on_progress(result)` é chamado a cada bloco, antes do commit dele.
+    """
+    result = {
+        "file_name": file_name,
+        "rows_parsed": 0,
+        "rows_imported": 0,
+        "rows_skipped": 0,
+        "rows_rejected": 0,
+        "rejected_rows": [],
+    }
+    category_cache = {}
+
+    for chunk in _iter_chunks(file_content, file_name, chunk_size):
+        parsed, rejected = _parse_chunk(chunk)
+        result["rows_parsed"] += len(chunk)
+        result["rows_rejected"] += len(rejected)
+        result["rejected_rows"].extend(
+            rejected[:MAX_REJECTED_REPORT - len(result["rejected_rows"])]
         )
 
-    transactions_added = 0
-    transactions_skipped = 0
+        with write_queue.slot(background=True):
+            rows, skipped = _build_chunk_rows(db, parsed, category_cache)
+            result["rows_skipped"] += skipped
+
+            try:
+                if rows:
+                    db.execute(insert(models.Transaction), rows)
+                    record_transaction_changes(db, added=map(transaction_facts, rows))
+                    bump_data_version(db)
+                result["rows_imported"] += len(rows)
+                if on_progress:
+                    on_progress(result)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                raise ValueError(f"Erro ao salvar no banco: {e}")
 
-    for _, row in df.iterrows():
+    with write_queue.slot(background=True):
         try:
-            parsed_date = pd.to_datetime(row["date"], dayfirst=True).date()
-            value_str = str(row["value"]).strip().replace("R$", "").replace(".", "").replace(",", ".")
-            parsed_value = float(value_str)
-            parsed_description = str(row["description"]).strip()
-            parsed_type = str(row["type"]).lower().strip()
+            log_entry = models.ImportLog(
+                file_name=file_name, rows_imported=result["rows_imported"]
+            )
+            db.add(log_entry)
+            db.commit()
         except Exception as e:
-            print(f"Skipping row due to invalid data: {e}")
-            continue
+            db.rollback()
+            raise ValueError(f"Erro ao salvar no banco (log): {e}")
+
+    return result
+
 
-        existing_tx = (
-            db.query(models.Transaction)
+def _job_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _renew_job_leases(db: Session, owner: str):
+    """Renova o lease dos jobs em aberto do processo (o que roda e os da fila dele)."""
+    db.query(models.ImportJob).filter(
+        models.ImportJob.owner == owner,
+        models.ImportJob.status.in_(("pending", "running")),
+    ).update({"heartbeat_at": datetime.now(timezone.utc)}, synchronize_session=False)
+
+
+def create_import_job(db: Session, file_name: str):
+    db_job = models.ImportJob(
+        file_name=file_name, status="pending",
+        owner=_job_owner(), heartbeat_at=datetime.now(timezone.utc),
+    )
+    db.add(db_job)
+    with write_queue.slot():
+        db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+def get_import_job(db: Session, job_id: int):
+    return db.query(models.ImportJob).filter(models.ImportJob.id == job_id).first()
+
+
+def list_import_jobs(db: Session, limit: int = 20):
+    return (
+        db.query(models.ImportJob)
+        .order_by(models.ImportJob.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def fail_interrupted_import_jobs(db: Session) -> int:
+    """
+    Marca como failed os jobs pending/running cujo lease venceu: o processo
+    dono parou (reinício, queda) sem terminá-los. Os de outros workers ainda
+    vivos continuam renovando o lease e não são tocados. Chamado na subida do
+    servidor e depois periodicamente. Retorna quantos foram marcados.
+    """
+    expired = datetime.now(timezone.utc) - timedelta(seconds=IMPORT_JOB_LEASE_SECONDS)
+    with write_queue.slot():
+        count = (
+            db.query(models.ImportJob)
             .filter(
-                models.Transaction.date == parsed_date,
-                models.Transaction.description == parsed_description,
-                models.Transaction.value == parsed_value,
-                models.Transaction.type == parsed_type,
+                models.ImportJob.status.in_(("pending", "running")),
+                or_(
+                    models.ImportJob.heartbeat_at.is_(None),
+                    models.ImportJob.heartbeat_at < expired,
+                ),
+            )
+            .update(
+                {
+                    "status": "failed",
+                    "error": INTERRUPTED_JOB_ERROR,
+                    "finished_at": datetime.now(timezone.utc),
+                },
+                synchronize_session=False,
             )
-            .first()
         )
+        db.commit()
+    return count
 
-        if existing_tx:
-            transactions_skipped += 1
-            continue
-
-        category_obj = None
-        if "category_name" in row and pd.notna(row["category_name"]):
-            category_obj = get_category_by_name(db, name=row["category_name"])
-        if not category_obj:
-            category_obj = find_category_by_keyword(db, parsed_description)
-
-        db_transaction = models.Transaction(
-            date=parsed_date, description=parsed_description,
-            value=parsed_value, type=parsed_type,
-            account=row.get("account"),
-            category_id=category_obj.id if category_obj else None,
-        )
-        db.add(db_transaction)
-        transactions_added += 1
 
-    try:
-        log_entry = models.ImportLog(
-            file_name=file_name, rows_imported=transactions_added
-        )
-        db.add(log_entry)
+def run_import_job(db: Session, job_id: int, file_path: str, file_name: str):
+    """
+    Executa a importação de um job (chamado pelo worker, fora da requisição).
+    O progresso é gravado junto com o commit de cada bloco, que também renova
+    o lease dos jobs do processo.
+    """
+    owner = _job_owner()
+    with write_queue.slot(background=True):
+        db_job = get_import_job(db, job_id)
+        if db_job is None or db_job.status != "pending":
+            return db_job  # Já dado como interrompido (lease vencido)
+        db_job.status = "running"
+        db_job.started_at = db_job.heartbeat_at = datetime.now(timezone.utc)
+        db_job.owner = owner
         db.commit()
+
+    def record_counts(result):
+        db_job.rows_parsed = result["rows_parsed"]
+        db_job.rows_imported = result["rows_imported"]
+        db_job.rows_skipped = result["rows_skipped"]
+        db_job.rows_rejected = result["rows_rejected"]
+
+    def on_progress(result):
+        # Dentro da vez de escrita do bloco: entra no commit dele
+        record_counts(result)
+        _renew_job_leases(db, owner)
+
+    try:
+        with open(file_path, "rb") as f:
+            result = process_import_file(db, f, file_name, on_progress=on_progress)
+        record_counts(result)
+        db_job.rejected_rows = result["rejected_rows"]
+        db_job.status = "done"
     except Exception as e:
         db.rollback()
-        raise ValueError(f"Erro ao salvar no banco (log): {e}")
+        db_job.status = "failed"
+        db_job.error = str(e)
 
-    return {
-        "file_name": file_name,
-        "rows_imported": transactions_added,
-        "rows_skipped": transactions_skipped,
-    }
\ No newline at end of file
+    db_job.finished_at = datetime.now(timezone.utc)
+    with write_queue.slot(background=True):
+        db.commit()
+    db.refresh(db_job)
+    return db_job
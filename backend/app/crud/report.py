@@ -2,41 +2,71 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import date
 from typing import Optional
-from .. import models, schemas
+from .. import models
+from . import analytics
+from .dashboard import category_expenses_from_memory, category_names
 
-def get_report_expenses_by_category(
+# Como no dashboard: load_* só usa o banco e build_* só faz contas
+
+def load_report_expenses_by_category(
     db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None
 ):
+    if analytics.ANALYTICS_ENGINE == "memory":
+        return {
+            "period": (start_date, end_date),
+            "analytics": analytics.columnar_analytics.read(db),
+            "category_names": category_names(db),
+        }
+
     query = (
         db.query(
             models.Category.name,
-            func.sum(models.Transaction.value).label("total_value"),
+            func.sum(models.DailyTotal.total).label("total_value"),
         )
-        .select_from(models.Transaction)
+        .select_from(models.DailyTotal)
         .join(
             models.Category,
-            models.Transaction.category_id == models.Category.id,
+            models.DailyTotal.category_id == models.Category.id,
             isouter=True,
         )
-        .filter(models.Transaction.type == "expense")
+        .filter(models.DailyTotal.type == "expense")
     )
 
     if start_date:
-        query = query.filter(models.Transaction.date >= start_date)
+        query = query.filter(models.DailyTotal.date >= start_date)
     if end_date:
-        query = query.filter(models.Transaction.date <= end_date)
+        query = query.filter(models.DailyTotal.date <= end_date)
 
     results = (
         query.group_by(models.Category.name)
-        .order_by(func.sum(models.Transaction.value).desc())
+        .order_by(func.sum(models.DailyTotal.total).desc())
         .all()
     )
+    return {"rows": results}
 
-    chart_data = []
-    for r in results:
-        chart_data.append(
-            schemas.CategoryExpense(
-                name=r.name if r.name else "Sem Categoria", value=r.total_value or 0.0
-            )
+
+def build_report_expenses_by_category(loaded: dict):
+    if "analytics" in loaded:
+        by_name = category_expenses_from_memory(
+            analytics.columnar_analytics.columns(loaded["analytics"]),
+            loaded["category_names"],
+            *loaded["period"],
         )
-    return chart_data
\ No newline at end of file
+        return [
+            {"name": name if name else "Sem Categoria", "value": total}
+            for name, total in sorted(by_name.items(), key=lambda item: -item[1])
+        ]
+
+    # Já no formato de schemas.CategoryExpense (dicts, sem validar por linha)
+    return [
+        {"name": r.name if r.name else "Sem Categoria", "value": float(r.total_value or 0.0)}
+        for r in loaded["rows"]
+    ]
+
+
+def get_report_expenses_by_category(
+    db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None
+):
+    return build_report_expenses_by_category(
+        load_report_expenses_by_category(db, start_date, end_date)
+    )
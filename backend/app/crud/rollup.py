@@ -0,0 +1,155 @@
+from collections import defaultdict
+from typing import Iterable, Tuple, Optional
+from datetime import date
+from sqlalchemy import insert, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from .. import models
+from .versioning import bump_data_version
+from .analytics import record_analytics_deltas
+
+# (date, type, category_id, value) de uma transação
+TransactionFacts = Tuple[date, str, Optional[int], float]
+
+_daily_totals = models.DailyTotal.__table__
+_monthly_totals = models.MonthlyTotal.__table__
+
+# Colunas/expressões dos índices únicos (alvo do ON CONFLICT de cada agregado)
+_DAILY_KEY = (
+    _daily_totals.c.date,
+    _daily_totals.c.type,
+    models.rollup_category_key(_daily_totals.c.category_id),
+)
+_MONTHLY_KEY = (_monthly_totals.c.month, _monthly_totals.c.type)
+
+# INSERT com ON CONFLICT de cada dialeto
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def transaction_facts(tx) -> TransactionFacts:
+    """Extrai de uma transação (objeto ou dict) os campos usados nos agregados."""
+    if isinstance(tx, dict):
+        return (tx["date"], tx["type"], tx.get("category_id"), tx["value"])
+    return (tx.date, tx.type, tx.category_id, tx.value)
+
+
+def _apply_deltas(db: Session, table, key_columns, conflict_key, deltas):
+    """
+    Soma os deltas {chave: [total, count]} na tabela de agregado com um upsert
+    em lote (INSERT ... ON CONFLICT DO UPDATE sobre o índice único da chave) e
+    apaga as linhas que zeraram.
+    """
+    deltas = {key: d for key, d in deltas.items() if d[1] != 0 or d[0] != 0}
+    if not deltas:
+        return
+
+    upsert = _UPSERT_INSERTS[db.get_bind().dialect.name](table)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=conflict_key,
+        set_={
+            "sum": table.c.sum + upsert.excluded["sum"],
+            "count": table.c.count + upsert.excluded["count"],
+        },
+    )
+    db.execute(upsert, [
+        {**dict(zip(key_columns, key)), "sum": total, "count": count}
+        for key, (total, count) in deltas.items()
+    ])
+    # Só linhas das datas tocadas podem ter zerado
+    db.execute(
+        delete(table).where(
+            table.c[key_columns[0]].in_(list({key[0] for key in deltas})),
+            table.c.count <= 0,
+        )
+    )
+
+
+def record_transaction_changes(
+    db: Session,
+    added: Iterable[TransactionFacts] = (),
+    removed: Iterable[TransactionFacts] = (),
+):
+    """
+    Aplica nas tabelas daily_totals e monthly_totals o efeito de transações
+    incluídas/removidas. Roda dentro da transação do chamador (o commit é dele),
+    então os agregados ficam sempre consistentes com a tabela transactions.
+    """
+    daily = defaultdict(lambda: [0.0, 0])
+    for sign, facts in ((1, added), (-1, removed)):
+        for tx_date, tx_type, category_id, value in facts:
+            delta = daily[(tx_date, tx_type, category_id)]
+            delta[0] += sign * value
+            delta[1] += sign
+    apply_rollup_deltas(db, daily)
+
+
+def apply_rollup_deltas(db: Session, daily):
+    """
+    Aplica deltas já agregados {(date, type, category_id): [soma, contagem]}
+    em daily_totals e no catálogo mensal (para quem já agregou no banco), e
+    os guarda para o motor analítico em memória aplicar depois do commit.
+    """
+    monthly = defaultdict(lambda: [0.0, 0])
+    for (tx_date, tx_type, _), (total, count) in daily.items():
+        delta = monthly[(tx_date.replace(day=1), tx_type)]
+        delta[0] += total
+        delta[1] += count
+
+    _apply_deltas(db, _daily_totals, ("date", "type", "category_id"), _DAILY_KEY, daily)
+    _apply_deltas(db, _monthly_totals, ("month", "type"), _MONTHLY_KEY, monthly)
+    record_analytics_deltas(db, daily)
+
+
+def rebuild_monthly_totals(db: Session):
+    """
+    Recalcula o catálogo mensal a partir de daily_totals (poucas linhas por dia),
+    sem varrer transactions. Não faz commit.
+    """
+    monthly = defaultdict(lambda: [0.0, 0])
+    for row in db.query(
+        models.DailyTotal.date,
+        models.DailyTotal.type,
+        func.sum(models.DailyTotal.total).label("total"),
+        func.sum(models.DailyTotal.count).label("count"),
+    ).group_by(models.DailyTotal.date, models.DailyTotal.type):
+        delta = monthly[(row.date.replace(day=1), row.type)]
+        delta[0] += row.total or 0.0
+        delta[1] += row.count or 0
+
+    db.execute(delete(_monthly_totals))
+    rows = [
+        {"month": month, "type": tx_type, "sum": total, "count": count}
+        for (month, tx_type), (total, count) in monthly.items()
+        if count > 0
+    ]
+    if rows:
+        db.execute(insert(_monthly_totals), rows)
+
+
+def rebuild_daily_totals(db: Session):
+    """
+    Recalcula daily_totals inteira a partir de transactions (backfill/reparo),
+    e o catálogo mensal junto.
+    """
+    db.execute(delete(_daily_totals))
+    db.execute(
+        insert(_daily_totals).from_select(
+            ["date", "type", "category_id", "sum", "count"],
+            db.query(
+                models.Transaction.date,
+                models.Transaction.type,
+                models.Transaction.category_id,
+                func.sum(models.Transaction.value),
+                func.count(models.Transaction.id),
+            )
+            .group_by(
+                models.Transaction.date,
+                models.Transaction.type,
+                models.Transaction.category_id,
+            )
+            .statement,
+        )
+    )
+    rebuild_monthly_totals(db)
+    bump_data_version(db)
+    db.commit()
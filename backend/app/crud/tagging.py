@@ -0,0 +1,92 @@
+import re
+import threading
+from typing import List, Optional, Sequence
+from sqlalchemy.orm import Session
+from .. import models
+from .versioning import get_data_version, CATEGORIES_SCOPE
+
+
+def split_keywords(raw: Optional[str]) -> List[str]:
+    """Quebra o campo `keywords` da categoria (separado por ; ou ,)."""
+    if not raw:
+        return []
+    return [kw for kw in (k.strip().lower() for k in re.split(r"[;,]", raw)) if kw]
+
+
+class KeywordTagger:
+    """
+    Auto-tagging por palavras-chave com uma única regex compilada para todas as
+    categorias. A regex só é reconstruída depois de `invalidate()` (chamado nas
+    escritas de categoria) ou quando a versão "categories" no banco muda (escrita
+    feita por outro worker), e não a cada transação.
+
+    Mantém a regra antiga: vence a primeira categoria (por id) que tiver alguma
+    palavra-chave contida na descrição.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stale = True
+        self._version = None
+        self._pattern = None
+        # palavra-chave -> (prioridade, category_id) da primeira categoria que a usa
+        self._keywords = {}
+
+    def invalidate(self):
+        self._stale = True
+
+    def _build(self, categories, version: int):
+        keywords = {}
+        for priority, category in enumerate(categories):
+            for kw in split_keywords(category.keywords):
+                keywords.setdefault(kw, (priority, category.id))
+
+        # Alternativas em ordem de prioridade: numa mesma posição do texto a regex
+        # devolve a categoria mais prioritária. O lookahead acha ocorrências sobrepostas.
+        ordered = sorted(keywords, key=lambda kw: (keywords[kw][0], -len(kw)))
+        pattern = (
+            re.compile("(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))")
+            if ordered else None
+        )
+        self._pattern, self._keywords = pattern, keywords
+        self._version = version
+        self._stale = False
+
+    def _ensure_built(self, db: Session):
+        version = get_data_version(db, CATEGORIES_SCOPE)
+        if self._stale or version != self._version:
+            # A consulta fica fora do lock: numa rota async (AsyncSession.run_sync)
+            # ela devolve o controle ao event loop, e outra requisição esperando
+            # este lock travaria a thread do loop inteira
+            categories = (
+                db.query(models.Category.id, models.Category.keywords)
+                .order_by(models.Category.id)
+                .all()
+            )
+            with self._lock:
+                if self._stale or version != self._version:
+                    self._build(categories, version)
+        return self._pattern, self._keywords
+
+    def tag(self, db: Session, descriptions: Sequence[Optional[str]]) -> List[Optional[int]]:
+        """Retorna o category_id sugerido (ou None) para cada descrição."""
+        pattern, keywords = self._ensure_built(db)
+        if pattern is None:
+            return [None] * len(descriptions)
+
+        # Descrições repetidas (ex: "UBER *TRIP") são avaliadas uma vez só
+        suggestions = {}
+        for description in dict.fromkeys(descriptions):
+            best = None
+            if description:
+                for match in pattern.finditer(description.lower()):
+                    candidate = keywords[match.group(1)]
+                    if best is None or candidate[0] < best[0]:
+                        best = candidate
+                        if best[0] == 0:
+                            break
+            suggestions[description] = best[1] if best else None
+        return [suggestions[description] for description in descriptions]
+
+
+category_tagger = KeywordTagger()
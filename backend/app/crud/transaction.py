@@ -1,12 +1,46 @@
 # backend/app/crud/transaction.py
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func, and_, or_, select, text, Integer, Float
 from datetime import date
 from typing import Optional
+import base64
+import hashlib
 from fastapi import HTTPException
-from .. import models, schemas
+from .. import models, schemas, search_index
+from ..search_index import normalize_search_text
 from .category import get_category_by_name, find_category_by_keyword
+from .tagging import category_tagger
+from .rollup import record_transaction_changes, transaction_facts
+from .versioning import bump_data_version
+
+
+def compute_fingerprint(tx_date: date, description: str, value: float, type: str) -> str:
+    """
+    Gera o fingerprint de uma transação a partir dos campos normalizados
+    (descrição sem espaços extras e em minúsculas, valor com 2 casas).
+    """
+    normalized = "|".join([
+        tx_date.isoformat(),
+        " ".join((description or "").lower().split()),
+        f"{value:.2f}",
+        (type or "").lower().strip(),
+    ])
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _claim_fingerprint(db: Session, fingerprint: str, exclude_id: Optional[int] = None):
+    """
+    Retorna o fingerprint se nenhuma outra transação o usa, senão None.
+    Lançamentos manuais repetidos (ex: dois cafés no mesmo dia) continuam
+    permitidos, só o primeiro fica com o fingerprint.
+    """
+    query = db.query(models.Transaction.id).filter(
+        models.Transaction.fingerprint == fingerprint
+    )
+    if exclude_id is not None:
+        query = query.filter(models.Transaction.id != exclude_id)
+    return None if query.first() else fingerprint
 
 
 def create_quick_entry(db: Session, entry: schemas.TransactionQuickCreate):  # ← MUDE AQUI
@@ -22,26 +56,33 @@ def create_quick_entry(db: Session, entry: schemas.TransactionQuickCreate):  # 
     parsed_type = entry.type.lower().strip()
 
     # 3. Tenta achar a categoria (Auto-Tagging)
-    category_obj = None
+    category_id = None
     if entry.category_name:
         category_obj = get_category_by_name(db, name=entry.category_name)
+        category_id = category_obj.id if category_obj else None
 
     # Se não achou pelo nome, tenta pelas keywords da descrição
-    if not category_obj:
-        category_obj = find_category_by_keyword(db, entry.description)
+    if category_id is None:
+        category_id = category_tagger.tag(db, [entry.description])[0]
 
     # 4. Cria o objeto da transação
+    description = entry.description.strip()
     db_transaction = models.Transaction(
         date=parsed_date,  # <-- Usa a data correta
-        description=entry.description.strip(),
+        description=description,
         value=entry.value,
         type=parsed_type,
         account=None,
-        category_id=category_obj.id if category_obj else None,
+        category_id=category_id,
+        fingerprint=_claim_fingerprint(
+            db, compute_fingerprint(parsed_date, description, entry.value, parsed_type)
+        ),
     )
 
-    # 5. Salva no banco
+    # 5. Salva no banco (junto com o agregado diário)
     db.add(db_transaction)
+    record_transaction_changes(db, added=[transaction_facts(db_transaction)])
+    bump_data_version(db)
     db.commit()
     db.refresh(db_transaction)
 
@@ -83,15 +124,143 @@ def get_recent_transactions(
     return results
 
 
+# Tamanho padrão de página do /transactions/all
+TRANSACTIONS_PAGE_SIZE = 100
+
+
+def encode_cursor(tx_date: date, tx_id: int) -> str:
+    """Cursor opaco (base64 url-safe) com a chave (date, id) da última linha da página."""
+    raw = f"{tx_date.isoformat()}_{tx_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Inverso de `encode_cursor`. Cursor inválido gera 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded).decode().split("_")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+
+
+def parse_month_range(month_year: Optional[str]):
+    """
+    Converte "YYYY-MM" no intervalo semiaberto (primeiro dia do mês, primeiro
+    dia do mês seguinte). Retorna None se vazio ou mal formatado.
+    """
+    if not month_year:
+        return None
+    try:
+        # Converte "YYYY-MM" em ano e mês
+        year, month = map(int, month_year.split("-"))
+        start = date(year, month, 1)
+    except ValueError:
+        return None  # Ignora filtro mal formatado
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def _filter_transactions(
+    db: Session,
+    query,
+    search: Optional[str] = None,
+    type: Optional[str] = None,
+    month_year: Optional[str] = None,  # Espera "YYYY-MM"
+):
+    """
+    Aplica os filtros da tela de Lançamentos (a busca também olha o nome da categoria).
+    """
+    # 1. Aplicar filtro de Tipo (expense, income, investment)
+    if type:
+        query = query.filter(models.Transaction.type == type)
+
+    # 2. Aplicar filtro de Mês/Ano (intervalo [início do mês, início do próximo),
+    # que usa os índices em date)
+    month_range = parse_month_range(month_year)
+    if month_range:
+        query = query.filter(
+            models.Transaction.date >= month_range[0],
+            models.Transaction.date < month_range[1],
+        )
+
+    # 3. Aplicar filtro de Busca (na descrição OU no nome da categoria)
+    if search:
+        condition = _search_condition(db, normalize_search_text(search))
+        if condition is not None:
+            query = query.filter(condition)
+
+    return query
+
+
+def _fts_matches(term: str):
+    """Subquery (rowid, rank) das transações cuja descrição contém `term` (FTS5 trigram)."""
+    phrase = '"' + term.replace('"', '""') + '"'
+    return (
+        text(
+            "SELECT rowid, bm25(transactions_fts) AS rank FROM transactions_fts "
+            "WHERE transactions_fts MATCH :fts_query"
+        )
+        .bindparams(fts_query=phrase)
+        .columns(rowid=Integer, rank=Float)
+        .subquery("fts")
+    )
+
+
+def _search_condition(db: Session, term: str):
+    """
+    Condição da busca (sem acentos, por substring) na descrição ou no nome
+    da categoria. A descrição usa o índice do banco (FTS5 / pg_trgm); as
+    categorias são poucas e são comparadas aqui mesmo.
+    """
+    if not term:
+        return None
+
+    category_ids = [
+        category.id
+        for category in db.query(models.Category.id, models.Category.name)
+        if term in normalize_search_text(category.name)
+    ]
+
+    if search_index.SEARCH_BACKEND == "fts5" and len(term) >= search_index.TRIGRAM_MIN_LENGTH:
+        fts = _fts_matches(term)
+        description_match = models.Transaction.id.in_(select(fts.c.rowid))
+    else:
+        # pg_trgm atende o LIKE '%termo%' pelo índice GIN; sem índice vira varredura
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        description_match = models.Transaction.search_text.like(f"%{escaped}%", escape="\\")
+
+    if category_ids:
+        return or_(description_match, models.Transaction.category_id.in_(category_ids))
+    return description_match
+
+
+def _apply_relevance_order(query, term: str):
+    """Ordena pela relevância da descrição (bm25 no SQLite, similarity no Postgres)."""
+    if search_index.SEARCH_BACKEND == "fts5" and len(term) >= search_index.TRIGRAM_MIN_LENGTH:
+        fts = _fts_matches(term)
+        # bm25 menor = mais relevante; matches só pela categoria ficam depois
+        query = query.outerjoin(fts, fts.c.rowid == models.Transaction.id)
+        return query.order_by(func.coalesce(fts.c.rank, 0.0))
+    if search_index.SEARCH_BACKEND == "trgm":
+        return query.order_by(func.similarity(models.Transaction.search_text, term).desc())
+    return query
+
+
 def get_all_transactions(
     db: Session,
     search: Optional[str] = None,
     type: Optional[str] = None,
     month_year: Optional[str] = None,  # Espera "YYYY-MM"
+    limit: int = TRANSACTIONS_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    order: str = "date",  # "date" ou "relevance" (só com busca)
 ):
     """
-    Busca TODAS as transações com filtros e retorna
-    a lista E o sumário.
+    Busca uma página de transações com filtros (paginação por cursor em
+    date DESC, id DESC) e o sumário de TODAS as transações filtradas.
+    Com order="relevance" e uma busca, retorna só a primeira página, das
+    transações mais relevantes para as menos relevantes.
     """
 
     # Query base que une Transações e Categorias
@@ -106,76 +275,121 @@ def get_all_transactions(
         models.Category,
         models.Transaction.category_id == models.Category.id,
     )
+    query = _filter_transactions(db, query, search, type, month_year)
 
-    # 1. Aplicar filtro de Tipo (expense, income, investment)
-    if type:
-        query = query.filter(models.Transaction.type == type)
-
-    # 2. Aplicar filtro de Mês/Ano
-    if month_year:
-        try:
-            # Converte "YYYY-MM" em ano e mês
-            year, month = map(int, month_year.split("-"))
-            query = query.filter(
-                extract("year", models.Transaction.date) == year,
-                extract("month", models.Transaction.date) == month,
-            )
-        except ValueError:
-            pass  # Ignora filtro mal formatado
+    term = normalize_search_text(search)
+    by_relevance = order == "relevance" and bool(term)
+    if by_relevance:
+        query = _apply_relevance_order(query, term)
 
-    # 3. Aplicar filtro de Busca (na descrição OU no nome da categoria)
-    if search:
-        search_term = f"%{search.lower()}%"
+    # Keyset: continua logo depois da última linha da página anterior
+    if cursor and not by_relevance:
+        last_date, last_id = decode_cursor(cursor)
         query = query.filter(
-            (func.lower(models.Transaction.description).like(search_term))
-            | (func.lower(models.Category.name).like(search_term))
+            or_(
+                models.Transaction.date < last_date,
+                and_(models.Transaction.date == last_date, models.Transaction.id < last_id),
+            )
         )
 
-    # Ordena e executa a query para a lista
-    transactions = query.order_by(models.Transaction.date.desc()).all()
+    # Busca uma linha a mais só para saber se existe próxima página
+    rows = (
+        query.order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    transactions = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and not by_relevance:
+        last = transactions[-1]
+        next_cursor = encode_cursor(last.date, last.id)
+
+    # Sumário calculado no banco, com os mesmos filtros (sem o cursor). Sem
+    # busca, os filtros de tipo/mês são atendidos pelo catálogo mensal.
+    if term:
+        summary_query = db.query(
+            models.Transaction.type,
+            func.sum(models.Transaction.value),
+            func.count(models.Transaction.id),
+        )
+        summary_query = _filter_transactions(db, summary_query, search, type, month_year)
+        group_column = models.Transaction.type
+    else:
+        summary_query = db.query(
+            models.MonthlyTotal.type,
+            func.sum(models.MonthlyTotal.total),
+            func.sum(models.MonthlyTotal.count),
+        )
+        if type:
+            summary_query = summary_query.filter(models.MonthlyTotal.type == type)
+        month_range = parse_month_range(month_year)
+        if month_range:
+            summary_query = summary_query.filter(models.MonthlyTotal.month == month_range[0])
+        group_column = models.MonthlyTotal.type
+    totals = {
+        tx_type: (total or 0.0, count or 0)
+        for tx_type, total, count in summary_query.group_by(group_column)
+    }
 
-    # Calcula o sumário a partir dos resultados filtrados (em Python)
     summary = {
-        "total_income": 0.0,
-        "total_expense": 0.0,
-        "total_investment": 0.0,
+        "total_income": totals.get("income", (0.0, 0))[0],
+        "total_expense": totals.get("expense", (0.0, 0))[0],
+        "total_investment": totals.get("investment", (0.0, 0))[0],
+        "transaction_count": sum(count for _, count in totals.values()),
     }
-
-    for tx in transactions:
-        if tx.type == "income":
-            summary["total_income"] += tx.value
-        elif tx.type == "expense":
-            summary["total_expense"] += tx.value
-        elif tx.type == "investment":
-            summary["total_investment"] += tx.value
-
     summary["balance"] = summary["total_income"] - summary["total_expense"]
 
     # Retorna o dicionário completo
-    return {"transactions": transactions, "summary": summary}
+    return {"transactions": transactions, "summary": summary, "next_cursor": next_cursor}
 
 
 def get_available_months(db: Session):
     """
-    Retorna uma lista de meses/anos (ex: "2024-10") que possuem transações.
+    Retorna uma lista de meses/anos (ex: "2024-10") que possuem transações,
+    lida do catálogo mensal (sem varrer transactions).
     """
-    # Usamos distinct() e extraímos ano e mês
     results = (
-        db.query(
-            extract("year", models.Transaction.date).label("year"),
-            extract("month", models.Transaction.date).label("month"),
-        )
-        .distinct()
-        .order_by(
-            extract("year", models.Transaction.date).desc(),
-            extract("month", models.Transaction.date).desc(),
-        )
+        db.query(models.MonthlyTotal.month)
+        .group_by(models.MonthlyTotal.month)
+        .having(func.sum(models.MonthlyTotal.count) > 0)
+        .order_by(models.MonthlyTotal.month.desc())
         .all()
     )
 
     # Formata como "YYYY-MM"
-    month_list = [f"{r.year}-{str(r.month).zfill(2)}" for r in results]
-    return month_list
+    return [r.month.strftime("%Y-%m") for r in results]
+
+
+def get_month_summaries(db: Session):
+    """
+    Totais por mês (mais recente primeiro) lidos do catálogo mensal, para os
+    cabeçalhos de mês e o seletor de período.
+    """
+    months = {}
+    for row in (
+        db.query(
+            models.MonthlyTotal.month,
+            models.MonthlyTotal.type,
+            func.sum(models.MonthlyTotal.total).label("total"),
+            func.sum(models.MonthlyTotal.count).label("count"),
+        )
+        .group_by(models.MonthlyTotal.month, models.MonthlyTotal.type)
+        .order_by(models.MonthlyTotal.month.desc())
+    ):
+        if not row.count:
+            continue
+        month = months.setdefault(row.month, {
+            "month_year": row.month.strftime("%Y-%m"),
+            "total_income": 0.0, "total_expense": 0.0, "total_investment": 0.0,
+            "transaction_count": 0,
+        })
+        if row.type in ("income", "expense", "investment"):
+            month[f"total_{row.type}"] += row.total or 0.0
+        month["transaction_count"] += row.count
+
+    for month in months.values():
+        month["balance"] = month["total_income"] - month["total_expense"]
+    return list(months.values())
 
 
 def delete_transaction(db: Session, transaction_id: int):
@@ -190,7 +404,9 @@ def delete_transaction(db: Session, transaction_id: int):
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transação não encontrada")
 
+    record_transaction_changes(db, removed=[transaction_facts(db_transaction)])
     db.delete(db_transaction)
+    bump_data_version(db)
     db.commit()
     return {"ok": True}
 
@@ -209,6 +425,8 @@ def update_transaction(
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transação não encontrada")
 
+    previous_facts = transaction_facts(db_transaction)
+
     # 1. Lida com a Categoria
     if transaction_data.category_name is not None:
         category_obj = get_category_by_name(db, name=transaction_data.category_name)
@@ -232,6 +450,20 @@ def update_transaction(
         if value is not None:
             setattr(db_transaction, key, value)
 
+    db_transaction.search_text = normalize_search_text(db_transaction.description)
+    db_transaction.fingerprint = _claim_fingerprint(
+        db,
+        compute_fingerprint(
+            db_transaction.date, db_transaction.description,
+            db_transaction.value, db_transaction.type,
+        ),
+        exclude_id=db_transaction.id,
+    )
+    record_transaction_changes(
+        db, added=[transaction_facts(db_transaction)], removed=[previous_facts]
+    )
+    bump_data_version(db)
+
     # 3. Salva
     db.commit()
     db.refresh(db_transaction)
@@ -0,0 +1,57 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from .. import models
+
+TRANSACTIONS_SCOPE = "transactions"
+CATEGORIES_SCOPE = "categories"
+SCOPES = (TRANSACTIONS_SCOPE, CATEGORIES_SCOPE)
+
+
+def bump_data_version(db: Session, scope: str = TRANSACTIONS_SCOPE):
+    """
+    Incrementa a versão do escopo dentro da transação do chamador, de forma
+    atômica (UPDATE ... SET version = version + 1). Guarda em
+    db.info["data_version_bumps"] a versão de antes e a nova, para quem
+    precisa saber depois do commit qual escrita foi esta (ver analytics.py).
+    """
+    version = db.execute(
+        update(models.DataVersion)
+        .where(models.DataVersion.scope == scope)
+        .values(version=models.DataVersion.version + 1)
+        .returning(models.DataVersion.version)
+    ).scalar()
+    if version is None:
+        db.add(models.DataVersion(scope=scope, version=1))
+        version = 1
+    bumps = db.info.setdefault("data_version_bumps", {})
+    bumps[scope] = (bumps.get(scope, (version - 1,))[0], version)
+
+
+def get_data_versions(db: Session) -> dict:
+    return {
+        row.scope: row.version
+        for row in db.query(models.DataVersion.scope, models.DataVersion.version)
+    }
+
+
+def get_data_version(db: Session, scope: str) -> int:
+    version = (
+        db.query(models.DataVersion.version)
+        .filter(models.DataVersion.scope == scope)
+        .scalar()
+    )
+    return version or 0
+
+
+def data_version_token(db: Session) -> str:
+    """Versão combinada de todos os escopos, ex: "42.3"."""
+    versions = get_data_versions(db)
+    return ".".join(str(versions.get(scope, 0)) for scope in SCOPES)
+
+
+def ensure_data_versions(db: Session):
+    existing = set(get_data_versions(db))
+    for scope in SCOPES:
+        if scope not in existing:
+            db.add(models.DataVersion(scope=scope, version=0))
+    db.commit()
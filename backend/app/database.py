@@ -1,6 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
 import os
+import threading
+import time
 
 # A URL do banco de dados
 SQLALCHEMY_DATABASE_URL = os.environ.get(
@@ -8,6 +15,50 @@ SQLALCHEMY_DATABASE_URL = os.environ.get(
     "sqlite:///./painel.db"
 )
 
+# Réplica de leitura opcional (ex.: réplica do Supabase/PostgreSQL). Sem ela,
+# as rotas de leitura usam o banco principal
+SQLALCHEMY_READ_DATABASE_URL = os.environ.get("DATABASE_READ_URL")
+
+
+def _pool_options(url: str, prefix: str, pool_size: int, max_overflow: int) -> dict:
+    """
+    Tamanho do pool de conexões do engine, ajustável por variáveis de ambiente
+    (<prefix>_POOL_SIZE e <prefix>_MAX_OVERFLOW). O SQLite mantém o pool padrão.
+    """
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.environ.get(f"{prefix}_POOL_SIZE", pool_size)),
+        "max_overflow": int(os.environ.get(f"{prefix}_MAX_OVERFLOW", max_overflow)),
+    }
+
+
+def _read_only_options(url: str) -> dict:
+    # Na réplica PostgreSQL as transações abrem como READ ONLY
+    if url.startswith("postgresql"):
+        return {"execution_options": {"postgresql_readonly": True}}
+    return {}
+
+
+# Perfil de produção do SQLite, aplicado a cada conexão aberta: WAL (leitores
+# não esperam o escritor), fsync só nos checkpoints, leitura via mmap, cache
+# de páginas maior e espera pelo lock em vez de falhar na hora
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # Negativo = em KiB (64 MiB por conexão)
+    "busy_timeout": 15000,  # ms
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
 # Configuração do Engine
 if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
@@ -15,9 +66,27 @@ if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
     )
 else:
     # Para PostgreSQL (Supabase)
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL, **_pool_options(SQLALCHEMY_DATABASE_URL, "DB", 5, 10)
+    )
+
+# Engine de leitura, com pool próprio: as varreduras do dashboard e dos
+# relatórios não disputam conexões com as escritas
+if SQLALCHEMY_READ_DATABASE_URL is None:
+    read_engine = engine
+elif SQLALCHEMY_READ_DATABASE_URL.startswith("sqlite"):
+    read_engine = create_engine(
+        SQLALCHEMY_READ_DATABASE_URL, connect_args={"check_same_thread": False}
+    )
+else:
+    read_engine = create_engine(
+        SQLALCHEMY_READ_DATABASE_URL,
+        **_pool_options(SQLALCHEMY_READ_DATABASE_URL, "DB_READ", 10, 20),
+        **_read_only_options(SQLALCHEMY_READ_DATABASE_URL),
+    )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 def get_db():
@@ -25,4 +94,197 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db():
+    """Sessão para rotas que só leem: réplica se configurada, senão o principal."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def async_database_url(url: str):
+    """
+    URL equivalente com driver assíncrono: aiosqlite para SQLite e asyncpg
+    para PostgreSQL (o sslmode da URL do Supabase vira o parâmetro ssl do asyncpg).
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+        if "sslmode" in url.query:
+            sslmode = url.query["sslmode"]
+            url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+        return url
+    raise ValueError(f"Banco sem driver assíncrono configurado: {url.get_backend_name()}")
+
+
+# Engine assíncrono para as rotas async: as consultas esperam o banco no event
+# loop em vez de ocupar uma thread do threadpool do Starlette cada uma
+async_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL),
+    **_pool_options(SQLALCHEMY_DATABASE_URL, "DB", 5, 10),
+)
+
+if SQLALCHEMY_READ_DATABASE_URL is None:
+    async_read_engine = async_engine
+else:
+    async_read_engine = create_async_engine(
+        async_database_url(SQLALCHEMY_READ_DATABASE_URL),
+        **_pool_options(SQLALCHEMY_READ_DATABASE_URL, "DB_READ", 10, 20),
+        **_read_only_options(SQLALCHEMY_READ_DATABASE_URL),
+    )
+
+# expire_on_commit=False: os objetos devolvidos pelo CRUD são serializados
+# depois do commit, fora da sessão, e não podem disparar um refresh implícito
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+# Todas as conexões SQLite (síncronas e assíncronas, principal e réplica)
+# recebem o perfil acima
+for _engine in {engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine}:
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _apply_sqlite_pragmas)
+
+
+class WriteQueue:
+    """
+    Fila de escrita única para o SQLite, que aceita um escritor por vez. Sem
+    ela, escritas concorrentes (blocos da importação, lançamentos, operações em
+    lote) disputavam o lock do arquivo, e uma transação que já tinha lido e
+    depois tentava escrever falhava com "database is locked" sem esperar o
+    busy_timeout. Cada unidade de escrita espera a vez em ordem de chegada e
+    só então abre a transação. A importação e o re-tagging pedem a vez a cada
+    bloco e como escrita de fundo: as escritas das requisições passam na
+    frente, e esperam no máximo o bloco em andamento. Para a escrita de fundo
+    não ficar parada sob carga contínua, ela recebe a vez depois de
+    `foreground_burst` escritas das requisições seguidas na frente dela, ou
+    quando já espera há `background_max_wait` segundos (alternando com as
+    requisições, que nunca ficam paradas atrás dela). Leituras não entram na fila.
+    Com PostgreSQL (ou SQLITE_WRITE_QUEUE=0) a fila fica desligada.
+
+    A fila vale só dentro de um processo: com vários workers do uvicorn, cada
+    um tem a sua e entre eles só resta o busy_timeout do SQLite (o "database
+    is locked" volta a ser possível). Com SQLite, rode um worker só.
+    """
+
+    def __init__(
+        self, enabled: bool, foreground_burst: int = 8, background_max_wait: float = 1.0
+    ):
+        self.enabled = enabled
+        self.foreground_burst = foreground_burst
+        self.background_max_wait = background_max_wait
+        self._mutex = threading.Lock()
+        self._waiters = deque()
+        self._background_waiters = deque()  # (waiter, momento em que entrou)
+        self._foreground_streak = 0  # Vezes dadas às requisições com fundo esperando
+        self._busy = False
+
+    def _acquire_or_enqueue(self, waiter, background: bool = False) -> bool:
+        with self._mutex:
+            if not self._busy:
+                self._busy = True
+                return True
+            if background:
+                self._background_waiters.append((waiter, time.monotonic()))
+            else:
+                self._waiters.append(waiter)
+            return False
+
+    def _background_due(self) -> bool:
+        if not self._background_waiters:
+            return False
+        if not self._waiters or self._foreground_streak >= self.foreground_burst:
+            return True
+        # Pela espera, só depois de ao menos uma requisição: com duas escritas
+        # de fundo se revezando, a mais antiga sempre já esperou demais
+        waited = time.monotonic() - self._background_waiters[0][1]
+        return self._foreground_streak > 0 and waited >= self.background_max_wait
+
+    def _release(self):
+        with self._mutex:
+            if self._background_due():
+                waiter, _ = self._background_waiters.popleft()
+                self._foreground_streak = 0
+            elif self._waiters:
+                waiter = self._waiters.popleft()
+                if self._background_waiters:
+                    self._foreground_streak += 1
+            else:
+                self._busy = False
+                return
+        waiter()  # A vez passa direto para o próximo da fila
+
+    def _wake(self, future):
+        if future.cancelled():
+            self._release()  # Desistiu enquanto a vez chegava: passa adiante
+        else:
+            future.set_result(None)
+
+    @contextmanager
+    def slot(self, background: bool = False):
+        """Vez de escrever, para código síncrono (threadpool, jobs)."""
+        if not self.enabled:
+            yield
+            return
+        turn = threading.Event()
+        if not self._acquire_or_enqueue(turn.set, background):
+            turn.wait()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """Vez de escrever, esperada sem bloquear o event loop."""
+        if not self.enabled:
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def waiter():
+            loop.call_soon_threadsafe(self._wake, future)
+
+        if not self._acquire_or_enqueue(waiter):
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._mutex:
+                    queued = waiter in self._waiters
+                    if queued:
+                        self._waiters.remove(waiter)
+                # Cancelada depois de receber a vez: devolve
+                if not queued and future.done() and not future.cancelled():
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+
+write_queue = WriteQueue(
+    enabled=engine.dialect.name == "sqlite"
+    and os.environ.get("SQLITE_WRITE_QUEUE", "1") != "0"
+)
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.concurrency import run_in_threadpool
+from .database import SessionLocal
+from . import crud
+from .crud.importer import IMPORT_JOB_LEASE_SECONDS
+
+# Quantas importações rodam ao mesmo tempo neste processo
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", "2"))
+
+_executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="import-job")
+
+
+def spool_upload(source, suffix: str) -> str:
+    """
+    Copia o upload para um arquivo temporário em blocos e retorna o caminho.
+    O arquivo é apagado pelo worker ao final do job.
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        try:
+            shutil.copyfileobj(source, tmp, length=1024 * 1024)
+        except Exception:
+            os.remove(tmp.name)  # Cópia pela metade: não sobra arquivo no disco
+            raise
+        return tmp.name
+
+
+def _run_import_job(job_id: int, file_path: str, file_name: str):
+    try:
+        with SessionLocal() as db:
+            crud.run_import_job(db, job_id, file_path, file_name)
+    except Exception:
+        print(f"Erro no job de importação {job_id}:")
+        traceback.print_exc()
+    finally:
+        os.remove(file_path)
+
+
+def submit_import_job(job_id: int, file_path: str, file_name: str):
+    return _executor.submit(_run_import_job, job_id, file_path, file_name)
+
+
+def fail_interrupted_jobs():
+    """Jobs pending/running cujo processo dono parou (lease vencido) viram failed."""
+    with SessionLocal() as db:
+        count = crud.fail_interrupted_import_jobs(db)
+    if count:
+        print(f"⚠️ {count} importação(ões) interrompida(s) marcada(s) como falha.")
+
+
+async def sweep_interrupted_jobs():
+    """
+    Na subida e depois a cada IMPORT_JOB_LEASE_SECONDS: um job de um processo
+    que parou vira failed quando o lease dele vence, mesmo sem outra subida.
+    """
+    while True:
+        try:
+            await run_in_threadpool(fail_interrupted_jobs)
+        except Exception:
+            print("Erro ao marcar importações interrompidas:")
+            traceback.print_exc()
+        await asyncio.sleep(IMPORT_JOB_LEASE_SECONDS)
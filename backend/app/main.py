@@ -4,6 +4,8 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
 import json
 import os # <-- Adicionado para ler variáveis de ambiente
 from datetime import date, datetime
@@ -11,16 +13,32 @@ from app.schemas.transaction import TransactionQuickCreate
 
 
 # Importa os módulos da nossa aplicação
-from . import models
+from . import models, jobs
 from .database import engine
+from .migrations import run_migrations
+from .search_index import detect_search_backend
 
 # Agora importamos o 'importer' (o arquivo renomeado) junto com os outros
 from .routers import categories, transactions, dashboard, goals, reports, importer
 
-# Cria as tabelas no banco de dados (isso deve ser feito apenas UMA vez em produção)
-models.Base.metadata.create_all(bind=engine)
+# Aplica as migrações pendentes (app/migrations.py). Com AUTO_MIGRATE=0 elas
+# rodam só pela CLI (python -m app.cli migrate), por exemplo antes do deploy.
+if os.environ.get("AUTO_MIGRATE", "1") != "0":
+    run_migrations(engine)
+else:
+    detect_search_backend(engine)
 
-app = FastAPI(title="Painel Financeiro BI API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importações que um processo parado deixou pela metade não voltam a rodar:
+    # viram failed quando o lease vence (na subida e depois periodicamente)
+    sweeper = asyncio.create_task(jobs.sweep_interrupted_jobs())
+    yield
+    sweeper.cancel()
+
+
+app = FastAPI(title="Painel Financeiro BI API", lifespan=lifespan)
 
 # Configuração do CORS
 # 1. Pega o FRONTEND_URL da variável de ambiente, se existir
@@ -0,0 +1,301 @@
+# backend/app/migrations.py
+# Migrações versionadas do banco: rodam no startup (main.py) ou pela CLI
+# (python -m app.cli migrate | migrations | explain).
+
+from datetime import date, timedelta
+from sqlalchemy import inspect, text, event
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+from . import models
+from .crud.transaction import compute_fingerprint
+from .crud.rollup import rebuild_daily_totals, rebuild_monthly_totals
+from .crud.versioning import ensure_data_versions
+from .search_index import normalize_search_text, ensure_search_index, detect_search_backend
+
+# Tamanho do lote ao preencher colunas novas em bancos já existentes
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_fingerprints(db: Session):
+    """
+    Preenche o fingerprint das transações antigas, em lotes por id.
+    Se duas transações antigas forem iguais, só a primeira recebe o fingerprint.
+    """
+    seen = set()
+    last_id = 0
+    while True:
+        batch = (
+            db.query(
+                models.Transaction.id, models.Transaction.date,
+                models.Transaction.description, models.Transaction.value,
+                models.Transaction.type,
+            )
+            .filter(
+                models.Transaction.fingerprint.is_(None),
+                models.Transaction.id > last_id,
+            )
+            .order_by(models.Transaction.id)
+            .limit(BACKFILL_BATCH_SIZE)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        updates = []
+        for tx in batch:
+            fingerprint = compute_fingerprint(tx.date, tx.description, tx.value, tx.type)
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            updates.append({"tx_id": tx.id, "fp": fingerprint})
+
+        if updates:
+            db.execute(
+                text("UPDATE transactions SET fingerprint = :fp WHERE id = :tx_id"),
+                updates,
+            )
+        db.commit()
+
+
+def backfill_search_text(db: Session):
+    """Preenche a descrição normalizada (busca) das transações antigas, em lotes por id."""
+    last_id = 0
+    while True:
+        batch = (
+            db.query(models.Transaction.id, models.Transaction.description)
+            .filter(
+                models.Transaction.search_text.is_(None),
+                models.Transaction.id > last_id,
+            )
+            .order_by(models.Transaction.id)
+            .limit(BACKFILL_BATCH_SIZE)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+        db.execute(
+            text("UPDATE transactions SET search_text = :st WHERE id = :tx_id"),
+            [{"tx_id": tx.id, "st": normalize_search_text(tx.description)} for tx in batch],
+        )
+        db.commit()
+
+
+def _columns(engine, table: str):
+    return {c["name"] for c in inspect(engine).get_columns(table)}
+
+
+def _create_model_indexes(engine, table, names):
+    # IF NOT EXISTS em vez de checkfirst: a reflexão do SQLite não enxerga
+    # índices sobre expressões (ux_daily_totals_key)
+    with engine.begin() as conn:
+        for index in table.indexes:
+            if index.name in names:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def m0001_initial_schema(engine):
+    """Tabelas que ainda não existem (bancos novos recebem o schema completo)."""
+    models.Base.metadata.create_all(bind=engine)
+
+
+def m0002_transactions_fingerprint(engine):
+    if "fingerprint" not in _columns(engine, "transactions"):
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE transactions ADD COLUMN fingerprint VARCHAR(64)"))
+        with Session(engine) as db:
+            backfill_fingerprints(db)
+    # O índice único só é criado depois do preenchimento, sem colisões
+    _create_model_indexes(engine, models.Transaction.__table__, {"ix_transactions_fingerprint"})
+
+
+def m0003_transactions_search(engine):
+    if "search_text" not in _columns(engine, "transactions"):
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE transactions ADD COLUMN search_text VARCHAR"))
+        with Session(engine) as db:
+            backfill_search_text(db)
+    # FTS5 (SQLite) / pg_trgm (PostgreSQL) sobre search_text
+    ensure_search_index(engine)
+
+
+def m0004_data_versions(engine):
+    with Session(engine) as db:
+        ensure_data_versions(db)
+
+
+def m0005_daily_totals_backfill(engine):
+    # Agregado diário criado agora (tabela vazia) para um banco que já tem transações
+    with Session(engine) as db:
+        has_transactions = db.query(models.Transaction.id).first() is not None
+        has_totals = db.query(models.DailyTotal.id).first() is not None
+        if has_transactions and not has_totals:
+            rebuild_daily_totals(db)
+
+
+def m0006_transactions_performance_indexes(engine):
+    """Índices compostos usados por listagem, metas, relatórios e recentes."""
+    _create_model_indexes(
+        engine,
+        models.Transaction.__table__,
+        {
+            "ix_transactions_date_type",
+            "ix_transactions_category_type_date",
+            "ix_transactions_date_id_desc",
+        },
+    )
+    with engine.begin() as conn:
+        # Atualiza as estatísticas usadas pelo planner na escolha dos índices
+        conn.execute(text("ANALYZE"))
+
+
+def m0007_monthly_totals(engine):
+    """Catálogo mensal, preenchido a partir de daily_totals."""
+    models.MonthlyTotal.__table__.create(bind=engine, checkfirst=True)
+    with Session(engine) as db:
+        rebuild_monthly_totals(db)
+        db.commit()
+
+
+def m0008_goal_contributions(engine):
+    """Livro de aportes das metas."""
+    models.GoalContribution.__table__.create(bind=engine, checkfirst=True)
+
+
+def m0009_rollup_unique_keys(engine):
+    """
+    Índices únicos na chave de daily_totals e monthly_totals (os deltas passam
+    a entrar por upsert). Recalcula antes os agregados, o que junta as linhas
+    repetidas da mesma chave deixadas por escritas concorrentes.
+    """
+    with Session(engine) as db:
+        rebuild_daily_totals(db)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_daily_totals_date_type_category"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_monthly_totals_month_type"))
+    _create_model_indexes(engine, models.DailyTotal.__table__, {"ux_daily_totals_key"})
+    _create_model_indexes(engine, models.MonthlyTotal.__table__, {"ux_monthly_totals_key"})
+
+
+def m0010_import_job_lease(engine):
+    """Dono e lease dos jobs de importação (só os órfãos viram failed na subida)."""
+    columns = _columns(engine, "import_jobs")
+    table = models.ImportJob.__table__
+    with engine.begin() as conn:
+        for name in ("owner", "heartbeat_at"):
+            if name not in columns:
+                column_type = table.c[name].type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE import_jobs ADD COLUMN {name} {column_type}"))
+
+
+# (versão, nome, função) em ordem; uma migração aplicada nunca é editada,
+# mudanças novas entram como uma nova versão no fim da lista
+MIGRATIONS = [
+    (1, "initial_schema", m0001_initial_schema),
+    (2, "transactions_fingerprint", m0002_transactions_fingerprint),
+    (3, "transactions_search", m0003_transactions_search),
+    (4, "data_versions", m0004_data_versions),
+    (5, "daily_totals_backfill", m0005_daily_totals_backfill),
+    (6, "transactions_performance_indexes", m0006_transactions_performance_indexes),
+    (7, "monthly_totals", m0007_monthly_totals),
+    (8, "goal_contributions", m0008_goal_contributions),
+    (9, "rollup_unique_keys", m0009_rollup_unique_keys),
+    (10, "import_job_lease", m0010_import_job_lease),
+]
+
+# Chave do advisory lock do Postgres (vários workers subindo ao mesmo tempo)
+_PG_LOCK_KEY = 7_317_001
+
+
+def get_applied_versions(engine):
+    models.SchemaMigration.__table__.create(bind=engine, checkfirst=True)
+    with Session(engine) as db:
+        return {row.version for row in db.query(models.SchemaMigration.version)}
+
+
+def migration_status(engine):
+    """Lista (versão, nome, aplicada?) de todas as migrações conhecidas."""
+    applied = get_applied_versions(engine)
+    return [(version, name, version in applied) for version, name, _ in MIGRATIONS]
+
+
+def run_migrations(engine):
+    """
+    Aplica, em ordem, as migrações que ainda não constam em schema_migrations.
+    Retorna os nomes das migrações aplicadas nesta execução.
+    """
+    lock = None
+    if engine.dialect.name == "postgresql":
+        lock = engine.connect()
+        lock.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+    try:
+        applied = get_applied_versions(engine)
+        done = []
+        for version, name, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            migrate(engine)
+            with Session(engine) as db:
+                db.add(models.SchemaMigration(version=version, name=name))
+                db.commit()
+            done.append(name)
+        detect_search_backend(engine)
+        return done
+    finally:
+        if lock is not None:
+            lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+            lock.close()
+
+
+def _hot_queries(db: Session):
+    """Executa as consultas mais frequentes da API (as mesmas funções do crud)."""
+    from . import crud
+    from .crud.goal import _limit_goal_spending
+
+    today = date.today()
+    start = today - timedelta(days=30)
+    yield "transações recentes", lambda: crud.get_recent_transactions(db, start, today, limit=5)
+    yield "lançamentos (1ª página, tipo)", lambda: crud.get_all_transactions(db, type="expense")
+    yield "lançamentos (mês)", lambda: crud.get_all_transactions(db, month_year=today.strftime("%Y-%m"))
+    yield "KPIs do dashboard", lambda: crud.get_dashboard_kpis(db, start, today)
+    yield "gastos por categoria", lambda: crud.get_expenses_by_category(db, start, today)
+    yield "saldo ao longo do tempo", lambda: crud.get_balance_over_time(db, start, today)
+    yield "metas", lambda: crud.get_goals_page_data(db)
+    yield "gasto das metas de limite", lambda: _limit_goal_spending(db, {1, 2, 3}, today.replace(day=1), today)
+    yield "relatório por categoria", lambda: crud.get_report_expenses_by_category(db, start, today)
+
+
+def explain_hot_queries(engine):
+    """
+    Verificação dos índices: roda as consultas quentes, captura o SQL gerado
+    e retorna o plano de execução de cada SELECT, como
+    [(rótulo, sql, [linhas do plano])].
+    """
+    explain_prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    results = []
+    with Session(engine) as db:
+        for label, run in _hot_queries(db):
+            captured = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                    captured.append((statement, parameters))
+
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                run()
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+            db.rollback()
+
+            connection = db.connection()
+            for statement, parameters in captured:
+                cursor = connection.connection.cursor()
+                try:
+                    cursor.execute(explain_prefix + statement, parameters)
+                    plan = [" | ".join(str(col) for col in row) for row in cursor.fetchall()]
+                finally:
+                    cursor.close()
+                results.append((label, statement, plan))
+    return results
@@ -7,9 +7,13 @@ from sqlalchemy import (
     Date,  # <-- CORRIGIDO: de DATE para Date
     DateTime,  # <-- CORRIGIDO: de DATETIME para DateTime
     ForeignKey,
+    Text,
+    JSON,
+    Index,
 )
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, literal_column
 from .database import Base
+from .search_index import search_text_default
 
 
 class Transaction(Base):
@@ -23,10 +27,79 @@ class Transaction(Base):
     category_id = Column(Integer, ForeignKey("categories.id"))
     account = Column(String)
     is_fixed = Column(BOOLEAN, default=False)
+    # Hash de data/descrição/valor/tipo normalizados, usado na deduplicação da importação
+    fingerprint = Column(String(64), unique=True, index=True, nullable=True)
+    # Descrição normalizada (minúscula, sem acentos) indexada pela busca
+    search_text = Column(String, default=search_text_default, nullable=True)
     created_at = Column(
         DateTime(timezone=True), server_default=func.now()
     )  # <-- CORRIGIDO AQUI
 
+    # Criados pela migração 6 em bancos já existentes (app/migrations.py)
+    __table_args__ = (
+        Index("ix_transactions_date_type", "date", "type"),
+        Index("ix_transactions_category_type_date", "category_id", "type", "date"),
+        # Listagem e transações recentes: ORDER BY date DESC, id DESC
+        Index("ix_transactions_date_id_desc", date.desc(), id.desc()),
+    )
+
+
+def rollup_category_key(category_id):
+    """
+    Categoria na chave única de daily_totals: sem categoria (NULL) vira 0, já
+    que o índice único trataria cada NULL como um valor diferente.
+    """
+    return func.coalesce(category_id, literal_column("0"))
+
+
+class DailyTotal(Base):
+    """
+    Agregado diário das transações (soma e contagem por dia, tipo e categoria),
+    mantido pelas rotinas de escrita, com uma única linha por chave (os deltas
+    entram por upsert).
+    """
+    __tablename__ = "daily_totals"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    date = Column(Date, nullable=False)
+    type = Column(String, nullable=False)
+    category_id = Column(Integer, nullable=True)
+    total = Column("sum", REAL, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index(
+            "ux_daily_totals_key", date, type, rollup_category_key(category_id), unique=True
+        ),
+    )
+
+
+class MonthlyTotal(Base):
+    """
+    Catálogo mensal (mês, tipo): soma e contagem das transações, mantido junto
+    com daily_totals. Serve a lista de meses e os sumários sem varrer transactions.
+    """
+    __tablename__ = "monthly_totals"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    month = Column(Date, nullable=False)  # Primeiro dia do mês
+    type = Column(String, nullable=False)
+    total = Column("sum", REAL, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ux_monthly_totals_key", "month", "type", unique=True),)
+
+
+class DataVersion(Base):
+    """
+    Contador de versão por escopo ("transactions", "categories"), incrementado
+    por toda escrita. Fica no banco para que todos os workers vejam o mesmo valor.
+    """
+    __tablename__ = "data_versions"
+
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 
 class Category(Base):
     __tablename__ = "categories"
@@ -60,6 +133,19 @@ class Goal(Base):
     )  # <-- CORRIGIDO AQUI
 
 
+class GoalContribution(Base):
+    """
+    Livro de aportes (append-only): cada aporte numa meta de poupança vira uma
+    linha aqui, e goals.current_amount é atualizado atomicamente junto.
+    """
+    __tablename__ = "goal_contributions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    goal_id = Column(Integer, ForeignKey("goals.id"), nullable=False, index=True)
+    amount = Column(REAL, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class ImportLog(Base):
     __tablename__ = "import_logs"
 
@@ -71,3 +157,38 @@ class ImportLog(Base):
     imported_at = Column(
         DateTime(timezone=True), server_default=func.now()
     )  # <-- CORRIGIDO AQUI
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    file_name = Column(String)
+
+    # pending -> running -> done | failed
+    status = Column(String, nullable=False, default="pending")
+
+    rows_parsed = Column(Integer, nullable=False, default=0)
+    rows_imported = Column(Integer, nullable=False, default=0)
+    rows_skipped = Column(Integer, nullable=False, default=0)
+    rows_rejected = Column(Integer, nullable=False, default=0)
+    rejected_rows = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Processo dono do job ("host:pid") e último sinal de vida dele (lease):
+    # um job pending/running com o lease vencido ficou órfão
+    owner = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class SchemaMigration(Base):
+    """Migrações já aplicadas neste banco (ver app/migrations.py)."""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
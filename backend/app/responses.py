@@ -0,0 +1,34 @@
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    # Linhas do SQLAlchemy e schemas já validados viram dict sem validar de novo
+    if isinstance(value, Row):
+        return value._asdict()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    """Serializa com orjson (datas, dicts, listas, Rows e schemas Pydantic)."""
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    Resposta JSON serializada com orjson. Para as rotas quentes que já montam
+    o conteúdo no formato do response_model: devolver esta resposta faz o
+    FastAPI pular a validação/serialização do response_model (que continua
+    valendo para a documentação da API).
+    """
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content  # Já serializado (ex.: vindo do cache)
+        return dumps(content)
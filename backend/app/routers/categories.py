@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from .. import crud, schemas
-from ..database import get_db
+from .. import schemas
+from ..crud import aio
+from ..database import get_async_db
 
 router = APIRouter(
     prefix="/api/categories",
@@ -10,35 +11,35 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.Category)
-def create_category(
-    category: schemas.CategoryCreate, db: Session = Depends(get_db)
+async def create_category(
+    category: schemas.CategoryCreate, db: AsyncSession = Depends(get_async_db)
 ):
-    db_category = crud.get_category_by_name(db, name=category.name)
+    db_category = await aio.get_category_by_name(db, name=category.name)
     if db_category:
         raise HTTPException(status_code=400, detail="Categoria com este nome já existe")
-    return crud.create_category(db=db, category=category)
+    return await aio.create_category(db=db, category=category)
 
 @router.get("/", response_model=List[schemas.Category])
-def read_categories(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+async def read_categories(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)
 ):
-    categories = crud.get_categories(db, skip=skip, limit=limit)
+    categories = await aio.get_categories(db, skip=skip, limit=limit)
     return categories
 
 @router.delete("/{category_id}", status_code=204)
-def delete_a_category(category_id: int, db: Session = Depends(get_db)):
-    deleted_category = crud.delete_category(db, category_id=category_id)
+async def delete_a_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
+    deleted_category = await aio.delete_category(db, category_id=category_id)
     if deleted_category is None:
         raise HTTPException(status_code=404, detail="Categoria não encontrada")
     return
 
 @router.put("/{category_id}", response_model=schemas.Category)
-def update_a_category(
+async def update_a_category(
     category_id: int,
     category_data: schemas.CategoryUpdate, # Usa o schema de update para receber dados
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    updated_category = crud.update_category(
+    updated_category = await aio.update_category(
         db, category_id=category_id, category_data=category_data
     )
     if updated_category is None:
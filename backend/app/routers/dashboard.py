@@ -1,24 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Literal
 from datetime import date
 from .. import crud, schemas
-from ..database import get_db
+from ..cache import cached_response
+from ..database import get_async_read_db
 
 router = APIRouter(
     prefix="/api/dashboard",
     tags=["Dashboard"],
 )
 
+# Rotas async: as consultas (load_*) rodam na AsyncSession e o custo de CPU
+# (build_*: NumPy no motor em memória, LTTB da série de saldo, montagem) vai
+# para o threadpool em cached_response. O NumPy nunca roda dentro do greenlet
+# de AsyncSession.run_sync (as verificações de temporários dele percorrem a
+# pilha C e podem derrubar o processo)
+
 @router.get("/kpis/", response_model=schemas.DashboardKPIs)
-def read_dashboard_kpis(
+async def read_dashboard_kpis(
+    request: Request,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     try:
-        kpis = crud.get_dashboard_kpis(db=db, start_date=start_date, end_date=end_date)
-        return kpis
+        return await cached_response(
+            request, db, schemas.DashboardKPIs,
+            lambda session: crud.load_dashboard_kpis(session, start_date, end_date),
+            crud.build_dashboard_kpis,
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Erro ao calcular KPIs do dashboard: {e}"
@@ -28,16 +39,18 @@ def read_dashboard_kpis(
     "/chart/expenses-by-category",
     response_model=List[schemas.CategoryExpense],
 )
-def read_chart_expenses_by_category(
+async def read_chart_expenses_by_category(
+    request: Request,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     try:
-        chart_data = crud.get_expenses_by_category(
-            db=db, start_date=start_date, end_date=end_date
+        return await cached_response(
+            request, db, None,  # Seções já no formato da resposta
+            lambda session: crud.load_expenses_by_category(session, start_date, end_date),
+            crud.build_expenses_by_category,
         )
-        return chart_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao calcular gráfico: {e}")
 
@@ -45,18 +58,53 @@ def read_chart_expenses_by_category(
     "/chart/balance-over-time",
     response_model=List[schemas.BalanceOverTimePoint],
 )
-def read_chart_balance_over_time(
+async def read_chart_balance_over_time(
+    request: Request,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    granularity: Literal["day", "week", "month"] = "day",
+    max_points: Optional[int] = Query(None, ge=3),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     try:
-        chart_data = crud.get_balance_over_time(
-            db=db, start_date=start_date, end_date=end_date
+        return await cached_response(
+            request, db, None,  # Seções já no formato da resposta
+            lambda session: crud.load_balance_over_time(
+                session, start_date, end_date, granularity, max_points
+            ),
+            crud.build_balance_over_time,
         )
-        return chart_data
     except Exception as e:
         print(f"Erro em /balance-over-time: {e}")
         raise HTTPException(
             status_code=500, detail=f"Erro ao calcular gráfico de evolução: {e}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/bundle", response_model=schemas.DashboardBundle)
+async def read_dashboard_bundle(
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: Literal["day", "week", "month"] = "day",
+    max_points: Optional[int] = Query(None, ge=3),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    try:
+        timings = {}
+        response = await cached_response(
+            request, db, None,  # Seções já no formato da resposta
+            lambda session: crud.load_dashboard_bundle(
+                session, start_date, end_date, granularity, max_points, timings=timings
+            ),
+            lambda loaded: crud.build_dashboard_bundle(loaded, timings),
+        )
+        # Tempo de cada seção só quando o bundle foi calculado agora (fora do cache)
+        if timings:
+            response.headers["Server-Timing"] = ", ".join(
+                f"{section};dur={duration}" for section, duration in timings.items()
+            )
+        return response
+    except Exception as e:
+        print(f"Erro em /bundle: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao montar o dashboard: {e}")
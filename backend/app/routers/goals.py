@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from .. import crud, schemas
-from ..database import get_db
+from ..crud import aio
+from ..database import get_async_db, get_async_read_db
+from ..responses import ORJSONResponse, dumps
 
 router = APIRouter(
     prefix="/api/goals",
@@ -10,55 +13,84 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=schemas.GoalsPage)
-def read_goals_page(
-    filter: Optional[str] = None, db: Session = Depends(get_db)
+async def read_goals_page(
+    filter: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db)
 ):
+    # Como o dashboard: consultas na AsyncSession; o gasto das metas de limite
+    # (NumPy no motor em memória), a montagem e a serialização no threadpool
     try:
-        data = crud.get_goals_page_data(db=db, filter_type=filter)
-        return data
+        loaded = await aio.load_goals_page(db=db, filter_type=filter)
+        # Metas já montadas no formato de GoalsPage: serializa direto
+        content = await run_in_threadpool(lambda: dumps(crud.build_goals_page(loaded)))
+        return ORJSONResponse(content)
     except Exception as e:
         print(f"Erro ao buscar metas: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar metas: {e}")
 
 @router.post("/", response_model=schemas.Goal)
-def create_goal_endpoint(
-    goal_data: schemas.GoalCreate, db: Session = Depends(get_db)
+async def create_goal_endpoint(
+    goal_data: schemas.GoalCreate, db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        return crud.create_goal(db=db, goal_data=goal_data)
+        return await aio.create_goal(db=db, goal_data=goal_data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao criar meta: {e}")
 
 @router.put("/{goal_id}", response_model=schemas.Goal)
-def update_goal_endpoint(
+async def update_goal_endpoint(
     goal_id: int,
     goal_data: schemas.GoalCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
-        return crud.update_goal(db=db, goal_id=goal_id, goal_data=goal_data)
+        return await aio.update_goal(db=db, goal_id=goal_id, goal_data=goal_data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao atualizar meta: {e}")
 
 @router.delete("/{goal_id}")
-def delete_goal_endpoint(
-    goal_id: int, db: Session = Depends(get_db)
+async def delete_goal_endpoint(
+    goal_id: int, db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        return crud.delete_goal(db=db, goal_id=goal_id)
+        return await aio.delete_goal(db=db, goal_id=goal_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao apagar meta: {e}")
     
 @router.post("/{goal_id}/contribute", response_model=schemas.Goal)
-def add_contribution_endpoint(
+async def add_contribution_endpoint(
     goal_id: int, 
     amount: float = Body(..., embed=True, description="Valor do aporte"), # Recebe apenas o float
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Chama a nova função do CRUD
-        return crud.add_contribution_to_goal(db=db, goal_id=goal_id, amount=amount)
+        return await aio.add_contribution_to_goal(db=db, goal_id=goal_id, amount=amount)
     except HTTPException as e:
         raise e # Re-lança 400/404 do CRUD
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao adicionar aporte: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Erro ao adicionar aporte: {e}")
+
+
+@router.post("/contributions", response_model=List[schemas.Goal])
+async def add_contributions_batch_endpoint(
+    batch: schemas.GoalContributionBatch, db: AsyncSession = Depends(get_async_db)
+):
+    """Vários aportes (ex.: depósitos mensais recorrentes) numa única transação."""
+    try:
+        return await aio.add_goal_contributions(db=db, contributions=batch.contributions)
+    except HTTPException as e:
+        raise e  # Re-lança 400/404 do CRUD
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erro ao adicionar aportes: {e}")
+
+
+@router.get("/{goal_id}/contributions", response_model=List[schemas.GoalContribution])
+async def read_goal_contributions(
+    goal_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    try:
+        return await aio.get_goal_contributions(db=db, goal_id=goal_id, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar aportes: {e}")
@@ -1,30 +1,52 @@
+import os
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .. import crud
-from ..database import get_db
+from typing import List
+from .. import crud, schemas, jobs
+from ..crud import aio
+from ..database import get_db, get_async_db
 
 router = APIRouter(
     prefix="/api/import",
     tags=["Import"],
 )
 
-@router.post("/")
-async def import_transactions_file(
+@router.post("/", response_model=schemas.ImportJob, status_code=202)
+def import_transactions_file(
     db: Session = Depends(get_db), file: UploadFile = File(...)
 ):
     if not (file.filename.endswith(".csv") or file.filename.endswith(".xlsx")):
         raise HTTPException(
             status_code=400, detail="Apenas arquivos .csv ou .xlsx são suportados"
         )
-    
-    file_content = await file.read()
 
+    # A importação roda em segundo plano; a resposta só traz o job para acompanhar.
+    # A rota continua síncrona porque copia o upload para o disco (I/O bloqueante).
     try:
-        result = crud.process_import_file(
-            db=db, file_content=file_content, file_name=file.filename
-        )
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        file_path = jobs.spool_upload(file.file, suffix=os.path.splitext(file.filename)[1])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {e}")
+
+    # O arquivo só passa a ser do worker (que o apaga no fim) depois de entregue
+    try:
+        job = crud.create_import_job(db, file_name=file.filename)
+        jobs.submit_import_job(job.id, file_path, file.filename)
+        return job
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {e}")
\ No newline at end of file
+        os.remove(file_path)
+        raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {e}")
+
+@router.get("/jobs", response_model=List[schemas.ImportJob])
+async def read_import_jobs(limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await aio.list_import_jobs(db, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar importações: {e}")
+
+@router.get("/jobs/{job_id}", response_model=schemas.ImportJob)
+async def read_import_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    job = await aio.get_import_job(db, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Importação não encontrada")
+    return job
@@ -1,27 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date
 from .. import crud, schemas
-from ..database import get_db
+from ..cache import cached_response
+from ..database import get_async_read_db
 
 router = APIRouter(
     prefix="/api/reports",
     tags=["Reports"],
 )
 
+# Async como as rotas do dashboard: consultas na AsyncSession, contas no threadpool
+
 @router.get(
     "/expenses-by-category", response_model=List[schemas.CategoryExpense]
 )
-def read_report_expenses_by_category(
+async def read_report_expenses_by_category(
+    request: Request,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     try:
-        data = crud.get_report_expenses_by_category(
-            db=db, start_date=start_date, end_date=end_date
+        return await cached_response(
+            request, db, None,  # Linhas já no formato da resposta
+            lambda session: crud.load_report_expenses_by_category(
+                session, start_date, end_date
+            ),
+            crud.build_report_expenses_by_category,
         )
-        return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {e}")
\ No newline at end of file
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import date
 from .. import crud, schemas
-from ..database import get_db
+from ..crud import aio
+from ..database import get_db, get_read_db, get_async_db, get_async_read_db
+from ..responses import ORJSONResponse
 
 router = APIRouter(
     prefix="/api/transactions",
@@ -12,20 +16,20 @@ router = APIRouter(
 
 
 @router.get("/uncategorized-count")
-def read_uncategorized_count(db: Session = Depends(get_db)):
+async def read_uncategorized_count(db: AsyncSession = Depends(get_async_read_db)):
     try:
-        return crud.get_uncategorized_count(db=db)
+        return await aio.get_uncategorized_count(db=db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao contar transações: {e}")
 
 @router.post("/add-simple", response_model=schemas.Transaction)
-def create_simple_transaction(
+async def create_simple_transaction(
     description: str = Body(...),
     value: float = Body(...),
     type: str = Body(...),
     category_name: Optional[str] = Body(None),
     date: Optional[str] = Body(None),  # ← Aceita string
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         print(f"🔍 SIMPLE - Dados: desc={description}, valor={value}, tipo={type}, cat={category_name}, data={date}")
@@ -39,9 +43,6 @@ def create_simple_transaction(
             except:
                 parsed_date = date.today()
         
-        # Chama o CRUD manualmente
-        from ..crud.transaction import create_quick_entry
-        
         # Cria um objeto simples (bypass do schema)
         class SimpleEntry:
             def __init__(self, description, value, type, category_name, date):
@@ -52,7 +53,7 @@ def create_simple_transaction(
                 self.date = date
         
         entry = SimpleEntry(description, value, type, category_name, parsed_date)
-        new_transaction = create_quick_entry(db=db, entry=entry)
+        new_transaction = await aio.create_quick_entry(db=db, entry=entry)
         return new_transaction
         
     except Exception as e:
@@ -60,25 +61,25 @@ def create_simple_transaction(
         raise HTTPException(status_code=400, detail=f"Erro ao salvar: {e}")
 
 @router.post("/add", response_model=schemas.Transaction)
-def create_quick_transaction(
-    entry: schemas.TransactionQuickCreate, db: Session = Depends(get_db)  # ← CORRETO
+async def create_quick_transaction(
+    entry: schemas.TransactionQuickCreate, db: AsyncSession = Depends(get_async_db)  # ← CORRETO
 ):
     try:
         print(f"🔍 SCHEMA TESTE - Campos: {QuickTestSchema.model_fields}")
-        new_transaction = crud.create_quick_entry(db=db, entry=entry)
+        new_transaction = await aio.create_quick_entry(db=db, entry=entry)
         return new_transaction
     except Exception as e:
         print(f"🔍 SCHEMA TESTE - Erro: {e}")
         raise HTTPException(status_code=400, detail=f"Erro ao salvar: {e}")
     
 @router.put("/{transaction_id}", response_model=schemas.Transaction)
-def update_transaction_endpoint(
+async def update_transaction_endpoint(
     transaction_id: int,
     transaction_data: schemas.TransactionUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
-        updated_transaction = crud.update_transaction(
+        updated_transaction = await aio.update_transaction(
             db=db, transaction_id=transaction_id, transaction_data=transaction_data
         )
         return updated_transaction
@@ -87,48 +88,163 @@ def update_transaction_endpoint(
 
 
 @router.delete("/{transaction_id}")
-def delete_transaction_endpoint(transaction_id: int, db: Session = Depends(get_db)):
+async def delete_transaction_endpoint(
+    transaction_id: int, db: AsyncSession = Depends(get_async_db)
+):
     try:
-        return crud.delete_transaction(db=db, transaction_id=transaction_id)
+        return await aio.delete_transaction(db=db, transaction_id=transaction_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao apagar: {e}")
 
 
 @router.get("/months", response_model=List[str])
-def read_available_months(db: Session = Depends(get_db)):
+async def read_available_months(db: AsyncSession = Depends(get_async_read_db)):
     try:
-        months = crud.get_available_months(db=db)
+        months = await aio.get_available_months(db=db)
         return months
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar meses: {e}")
 
 
+@router.get("/months/summary", response_model=List[schemas.MonthSummary])
+async def read_month_summaries(db: AsyncSession = Depends(get_async_read_db)):
+    try:
+        return await aio.get_month_summaries(db=db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar meses: {e}")
+
+
 @router.get("/all", response_model=schemas.TransactionPage)
-def read_all_transactions(
+async def read_all_transactions(
     search: Optional[str] = None,
     type: Optional[str] = None,
     month_year: Optional[str] = None,
-    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    order: Literal["date", "relevance"] = "date",
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     try:
-        result = crud.get_all_transactions(
-            db=db, search=search, type=type, month_year=month_year
+        result = await aio.get_all_transactions(
+            db=db, search=search, type=type, month_year=month_year,
+            limit=limit, cursor=cursor, order=order,
         )
-        return result
+        # Linhas já com as colunas de TransactionDetail: serializa direto
+        return ORJSONResponse(result)
+    except HTTPException as e:
+        raise e  # Cursor inválido (400)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar transações: {e}")
 
 
+@router.get("/export")
+def export_transactions(
+    format: Literal["csv", "ndjson", "xlsx", "parquet"] = "csv",
+    search: Optional[str] = None,
+    type: Optional[str] = None,
+    month_year: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Exporta todas as transações filtradas (mesmos filtros de /all), enviando
+    os blocos à medida que saem do cursor do banco. Continua síncrona: o
+    gerador roda no threadpool com a sessão síncrona aberta durante o envio.
+    """
+    try:
+        chunks = crud.export_transactions(
+            db=db, format=format, search=search, type=type, month_year=month_year,
+        )
+        return StreamingResponse(
+            chunks,
+            media_type=crud.EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="transacoes.{format}"'},
+        )
+    except HTTPException as e:
+        raise e  # Formato indisponível (400)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao exportar transações: {e}")
+
+
 @router.get("/recent", response_model=List[schemas.TransactionDetail])
-def read_recent_transactions(
+async def read_recent_transactions(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     try:
-        transactions = crud.get_recent_transactions(
+        transactions = await aio.get_recent_transactions(
             db=db, start_date=start_date, end_date=end_date, limit=5
         )
         return transactions
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar transações: {e}")
+
+
+@router.post("/retag", response_model=schemas.RetagResult)
+def retag_uncategorized(payload: schemas.RetagRequest, db: Session = Depends(get_db)):
+    """
+    Aplica as palavras-chave às transações sem categoria (dry_run só simula).
+    Continua síncrona (threadpool): em bases grandes leva segundos de CPU, que
+    travariam o event loop das rotas async.
+    """
+    try:
+        return crud.retag_uncategorized_transactions(
+            db=db, search=payload.search, type=payload.type,
+            month_year=payload.month_year, dry_run=payload.dry_run,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao recategorizar: {e}")
+
+
+# --- OPERAÇÕES EM LOTE (uma única transação do banco por chamada) ---
+
+@router.post("/bulk/create", response_model=schemas.BulkResult)
+async def bulk_create_transactions(
+    payload: schemas.TransactionBulkCreate, db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        return await aio.bulk_create_transactions(db=db, items=payload.transactions)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erro ao criar transações: {e}")
+
+
+@router.post("/bulk/update", response_model=schemas.BulkResult)
+async def bulk_update_transactions(
+    payload: schemas.TransactionBulkUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        return await aio.bulk_update_transactions(
+            db=db, selection=payload, changes=payload.changes
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erro ao atualizar transações: {e}")
+
+
+@router.post("/bulk/recategorize", response_model=schemas.BulkResult)
+async def bulk_recategorize_transactions(
+    payload: schemas.TransactionBulkRecategorize, db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        return await aio.bulk_recategorize_transactions(
+            db=db, selection=payload, category_name=payload.category_name
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erro ao recategorizar: {e}")
+
+
+@router.post("/bulk/delete", response_model=schemas.BulkResult)
+async def bulk_delete_transactions(
+    payload: schemas.TransactionSelection, db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        return await aio.bulk_delete_transactions(db=db, selection=payload)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Erro ao apagar transações: {e}")
@@ -14,6 +14,18 @@ from .transaction import (
     TransactionDetail,
     TransactionSummary,
     TransactionPage,
+    MonthSummary,
+    TransactionSelection,
+    TransactionBulkItem,
+    TransactionBulkCreate,
+    TransactionBulkChanges,
+    TransactionBulkUpdate,
+    TransactionBulkRecategorize,
+    BulkItemResult,
+    BulkResult,
+    RetagRequest,
+    RetagCategoryCount,
+    RetagResult,
     TransactionQuickCreate  # ← APENAS ESTE
 )
 
@@ -22,11 +34,20 @@ from .goal import (
     GoalCreate,
     GoalUpdate,
     GoalsSummary,
-    GoalsPage
+    GoalsPage,
+    GoalContribution,
+    GoalContributionCreate,
+    GoalContributionBatch,
 )
 
 from .dashboard import (
     DashboardKPIs,
     CategoryExpense,
-    BalanceOverTimePoint
+    BalanceOverTimePoint,
+    DashboardBundle
+)
+
+from .importer import (
+    ImportJob,
+    RejectedRow
 )
\ No newline at end of file
@@ -1,6 +1,8 @@
 # backend/app/schemas/dashboard.py
 
 from pydantic import BaseModel
+from typing import List
+from .transaction import TransactionDetail
 
 class DashboardKPIs(BaseModel):
     total_income: float
@@ -26,4 +28,12 @@ class BalanceOverTimePoint(BaseModel):
     expense: float
     balance: float
 
+    model_config = {"from_attributes": True}
+
+class DashboardBundle(BaseModel):
+    kpis: DashboardKPIs
+    expenses_by_category: List[CategoryExpense]
+    balance_over_time: List[BalanceOverTimePoint]
+    recent_transactions: List[TransactionDetail]
+
     model_config = {"from_attributes": True}
\ No newline at end of file
@@ -1,8 +1,8 @@
 # backend/app/schemas/goal.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import date
+from datetime import date, datetime
 
 class GoalBase(BaseModel):
     name: str
@@ -49,4 +49,19 @@ class GoalsPage(BaseModel):
     summary: GoalsSummary
     goals: List[Goal]
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+class GoalContributionCreate(BaseModel):
+    goal_id: int
+    amount: float = Field(..., gt=0, description="Valor do aporte")
+
+class GoalContributionBatch(BaseModel):
+    contributions: List[GoalContributionCreate] = Field(..., min_length=1)
+
+class GoalContribution(BaseModel):
+    id: int
+    goal_id: int
+    amount: float
+    created_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,38 @@
+# backend/app/schemas/importer.py
+
+from pydantic import BaseModel, computed_field
+from typing import Optional, List
+from datetime import datetime, timezone
+
+
+class RejectedRow(BaseModel):
+    row: int
+    reason: str
+    sheet: Optional[str] = None
+
+
+class ImportJob(BaseModel):
+    id: int
+    file_name: Optional[str] = None
+    status: str
+    rows_parsed: int = 0
+    rows_imported: int = 0
+    rows_skipped: int = 0
+    rows_rejected: int = 0
+    rejected_rows: Optional[List[RejectedRow]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+    @computed_field
+    @property
+    def elapsed_seconds(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        # SQLite devolve datas sem fuso; tudo é gravado em UTC
+        end = self.finished_at or datetime.now(timezone.utc)
+        delta = end.replace(tzinfo=None) - self.started_at.replace(tzinfo=None)
+        return round(delta.total_seconds(), 3)
@@ -1,8 +1,9 @@
 # backend/app/schemas/transaction.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import date
+import datetime
 
 
 class TransactionQuickCreate(BaseModel):
@@ -59,12 +60,92 @@ class TransactionSummary(BaseModel):
     total_expense: float
     total_investment: float
     balance: float
+    transaction_count: int = 0
 
     model_config = {"from_attributes": True}
 
 
+class MonthSummary(TransactionSummary):
+    month_year: str  # "YYYY-MM"
+
+
 class TransactionPage(BaseModel):
     transactions: List[TransactionDetail]
     summary: TransactionSummary
+    next_cursor: Optional[str] = None  # None = última página
 
     model_config = {"from_attributes": True}
+
+
+# --- Operações em lote ---
+# (datetime.date nas anotações: um campo chamado "date" esconderia o tipo date)
+
+class TransactionSelection(BaseModel):
+    """Transações alvo: uma lista de ids OU os mesmos filtros da listagem."""
+    ids: Optional[List[int]] = None
+    search: Optional[str] = None
+    type: Optional[str] = None
+    month_year: Optional[str] = None
+
+
+class TransactionBulkItem(BaseModel):
+    description: str
+    value: float
+    type: str
+    category_name: Optional[str] = None
+    account: Optional[str] = None
+    date: Optional[datetime.date] = None
+
+
+class TransactionBulkCreate(BaseModel):
+    transactions: List[TransactionBulkItem] = Field(..., min_length=1, max_length=10000)
+
+
+class TransactionBulkChanges(BaseModel):
+    description: Optional[str] = None
+    value: Optional[float] = None
+    type: Optional[str] = None
+    category_name: Optional[str] = None  # null remove a categoria
+    date: Optional[datetime.date] = None
+
+
+class TransactionBulkUpdate(TransactionSelection):
+    changes: TransactionBulkChanges
+
+
+class TransactionBulkRecategorize(TransactionSelection):
+    category_name: Optional[str] = None  # null remove a categoria
+
+
+class BulkItemResult(BaseModel):
+    id: Optional[int] = None
+    index: Optional[int] = None  # Posição na lista enviada (criação)
+    status: str  # created | updated | deleted | not_found
+
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+    affected: int
+    elapsed_ms: float
+
+
+class RetagRequest(BaseModel):
+    """Filtros opcionais (sem filtros = todas as transações sem categoria)."""
+    search: Optional[str] = None
+    type: Optional[str] = None
+    month_year: Optional[str] = None
+    dry_run: bool = False
+
+
+class RetagCategoryCount(BaseModel):
+    category_id: int
+    category_name: Optional[str] = None
+    count: int
+
+
+class RetagResult(BaseModel):
+    dry_run: bool
+    scanned: int
+    matched: int
+    categories: List[RetagCategoryCount]
+    elapsed_ms: float
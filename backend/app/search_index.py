@@ -0,0 +1,114 @@
+import logging
+import unicodedata
+from typing import Optional
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Backend de busca ativo, definido em `ensure_search_index` no startup:
+# "fts5" (SQLite com tokenizer trigram), "trgm" (PostgreSQL com pg_trgm)
+# ou "like" (sem índice: LIKE sobre a coluna já normalizada)
+SEARCH_BACKEND = "like"
+
+# O tokenizer trigram só encontra termos com 3 ou mais caracteres
+TRIGRAM_MIN_LENGTH = 3
+
+_SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        search_text, content='transactions', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, search_text)
+        VALUES ('delete', old.id, old.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF search_text ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, search_text)
+        VALUES ('delete', old.id, old.search_text);
+        INSERT INTO transactions_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+]
+
+
+def normalize_search_text(value: Optional[str]) -> str:
+    """
+    Texto usado na busca: minúsculo, sem acentos e com espaços colapsados
+    ("Café  Pão" -> "cafe pao").
+    """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.split())
+
+
+def search_text_default(context) -> str:
+    """Default da coluna `search_text`: vale também para inserts em lote (executemany)."""
+    return normalize_search_text(context.get_current_parameters().get("description"))
+
+
+def _ensure_sqlite_fts(conn) -> bool:
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'")
+    ).first() is not None
+    for statement in _SQLITE_FTS_DDL:
+        conn.execute(text(statement))
+    if not exists:
+        # Índice criado agora: indexa as transações que já existem
+        conn.execute(text("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')"))
+    return True
+
+
+def _ensure_postgres_trgm(conn) -> bool:
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_transactions_search_text_trgm "
+        "ON transactions USING gin (search_text gin_trgm_ops)"
+    ))
+    return True
+
+
+def ensure_search_index(engine):
+    """
+    Cria (se preciso) o índice de busca do banco em uso e define SEARCH_BACKEND.
+    Se o banco não suportar (SQLite sem FTS5, Postgres sem permissão para a
+    extensão), a busca continua funcionando com LIKE na coluna normalizada.
+    """
+    global SEARCH_BACKEND
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite" and _ensure_sqlite_fts(conn):
+                SEARCH_BACKEND = "fts5"
+            elif dialect == "postgresql" and _ensure_postgres_trgm(conn):
+                SEARCH_BACKEND = "trgm"
+    except Exception as e:
+        logger.warning("Índice de busca indisponível, usando LIKE: %s", e)
+        SEARCH_BACKEND = "like"
+
+
+def detect_search_backend(engine):
+    """Define SEARCH_BACKEND conforme o índice que já existe no banco (sem criar nada)."""
+    global SEARCH_BACKEND
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if dialect == "sqlite":
+            found = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'"
+            )).first()
+            SEARCH_BACKEND = "fts5" if found else "like"
+        elif dialect == "postgresql":
+            found = conn.execute(text(
+                "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_transactions_search_text_trgm'"
+            )).first()
+            SEARCH_BACKEND = "trgm" if found else "like"
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Banco SQLite temporário da suíte, definido antes de importar o app
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+
+import pytest
+from sqlalchemy import event
+from app.database import engine, SessionLocal
+from app.migrations import run_migrations
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    run_migrations(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Conta os comandos SQL enviados ao banco:
+    `with count_queries() as statements: ...` e depois `len(statements)`.
+    """
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counter
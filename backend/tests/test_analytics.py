@@ -0,0 +1,60 @@
+import threading
+import time
+from datetime import date
+from app.crud import analytics
+from app.crud.analytics import ColumnarAnalytics, SnapshotRead
+
+ROWS = [
+    (date(2024, 1, 1), 10.0, "expense", 1, 1),
+    (date(2024, 1, 2), 5.0, "income", None, 2),
+]
+
+
+def test_apply_does_not_wait_for_a_load_in_progress(monkeypatch):
+    store = ColumnarAnalytics()
+    store.columns(SnapshotRead(1, ROWS))
+
+    compact = analytics._compact
+    started = threading.Event()
+
+    def slow_compact(parts, type_codes):
+        started.set()
+        time.sleep(0.5)
+        return compact(parts, type_codes)
+
+    monkeypatch.setattr(analytics, "_compact", slow_compact)
+    loader = threading.Thread(target=store.columns, args=(SnapshotRead(1, ROWS),))
+    loader.start()
+    started.wait()
+
+    # O commit (after_commit -> apply) não espera as colunas serem montadas
+    begin = time.perf_counter()
+    store.apply(1, 2, {(date(2024, 1, 1), "expense", 1): [3.0, 1]})
+    assert time.perf_counter() - begin < 0.1
+    loader.join()
+
+
+def test_queued_deltas_match_a_reload():
+    store = ColumnarAnalytics()
+    store.columns(SnapshotRead(1, ROWS))
+    store.apply(1, 2, {
+        (date(2024, 1, 1), "expense", 1): [-10.0, -1],
+        (date(2024, 1, 3), "investment", 2): [7.0, 1],
+    })
+
+    merged = store.columns(SnapshotRead(2, None))
+    reloaded = ColumnarAnalytics().columns(SnapshotRead(2, [
+        (date(2024, 1, 2), 5.0, "income", None, 2),
+        (date(2024, 1, 3), 7.0, "investment", 2, 1),
+    ]))
+
+    def rows(columns):
+        codes = {code: name for name, code in columns.type_codes.items()}
+        return sorted(
+            (int(d), float(v), codes[int(t)], int(c), int(n))
+            for d, v, t, c, n in zip(
+                columns.days, columns.value, columns.type, columns.category, columns.count
+            )
+        )
+
+    assert rows(merged) == rows(reloaded)
@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+
+from app.cache import etag_matches
+from app.main import app
+
+ETAG = 'W/"12.3-0123456789abcdef"'
+
+
+def test_etag_matches_whole_tags_only():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches('"12.3-0123456789abcdef"', ETAG)  # Sem W/: comparação fraca
+    assert etag_matches('"outra", W/"12.3-0123456789abcdef" , "mais"', ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches("", ETAG)
+    # Uma tag que contém a atual (ou está contida nela) não é a mesma tag
+    assert not etag_matches('W/"12.3-0123456789abcdef0"', ETAG)
+    assert not etag_matches('W/"2.3-0123456789abcdef"', ETAG)
+    assert not etag_matches('x W/"12.3-0123456789abcdef"', ETAG)
+
+
+def test_cached_route_answers_304_only_for_a_matching_tag():
+    client = TestClient(app)
+    etag = client.get("/api/dashboard/kpis/").headers["ETag"]
+
+    assert client.get("/api/dashboard/kpis/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(
+        "/api/dashboard/kpis/", headers={"If-None-Match": f'"velha", {etag}'}
+    ).status_code == 304
+    assert client.get("/api/dashboard/kpis/", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get(
+        "/api/dashboard/kpis/", headers={"If-None-Match": f"{etag[:-1]}0\""}
+    ).status_code == 200
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+import httpx
+
+from app import crud
+from app.cache import response_cache
+from app.database import async_read_engine
+from app.main import app
+
+
+def test_slow_bundle_does_not_block_other_requests(monkeypatch):
+    # O build do bundle (CPU) roda no threadpool: enquanto ele demora, o event
+    # loop continua atendendo as outras rotas
+    build = crud.build_dashboard_bundle
+
+    def slow_build(loaded, timings=None):
+        time.sleep(0.5)
+        return build(loaded, timings)
+
+    monkeypatch.setattr(crud, "build_dashboard_bundle", slow_build)
+    response_cache.clear()
+    finished = {}
+
+    async def get(client, name, url):
+        response = await client.get(url)
+        finished[name] = time.perf_counter()
+        return response
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                started = time.perf_counter()
+                bundle = asyncio.create_task(get(client, "bundle", "/api/dashboard/bundle"))
+                await asyncio.sleep(0.05)
+                kpis = await get(client, "kpis", "/api/dashboard/kpis/")
+                return started, await bundle, kpis
+        finally:
+            await async_read_engine.dispose()
+
+    started, bundle, kpis = asyncio.run(scenario())
+
+    assert bundle.status_code == 200 and kpis.status_code == 200
+    assert finished["kpis"] < finished["bundle"]
+    assert finished["kpis"] - started < 0.4
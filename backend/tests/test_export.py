@@ -0,0 +1,47 @@
+from datetime import date
+import pytest
+from app import crud, schemas
+from app.crud.export import EXPORT_COLUMNS
+
+# A exportação sai da mais recente para a mais antiga; com o dia/mês trocado,
+# as de dia até 12 viram outra data e as demais seriam rejeitadas
+DATES = [date(2024, 3, 5), date(2024, 2, 11), date(2024, 1, 28), date(2023, 12, 31)]
+
+
+def _rows(db, search):
+    rows = crud.get_all_transactions(db, search=search, limit=100)["transactions"]
+    return sorted(
+        (row.date, row.description, row.value, row.type, row.category_name) for row in rows
+    )
+
+
+@pytest.mark.parametrize("format", ["csv", "xlsx"])
+def test_export_can_be_reimported(db, format):
+    marker = f"Reimportacao{format}"
+    crud.create_category(db, schemas.CategoryCreate(name=f"Mercado {format}"))
+    crud.bulk_create_transactions(db, [
+        schemas.TransactionBulkItem(
+            description=f"{marker} {i}",
+            value=10.5 * (i + 1),
+            type="expense" if i % 2 else "income",
+            category_name=f"Mercado {format}" if i % 2 else None,
+            date=tx_date,
+        )
+        for i, tx_date in enumerate(DATES)
+    ])
+    original = _rows(db, marker)
+    assert len(original) == len(DATES)
+
+    exported = b"".join(crud.export_transactions(db, format=format, search=marker))
+    crud.bulk_delete_transactions(db, schemas.TransactionSelection(search=marker))
+    assert _rows(db, marker) == []
+
+    result = crud.process_import_file(db, exported, f"transacoes.{format}")
+    assert result["rows_rejected"] == 0
+    assert result["rows_imported"] == len(DATES)
+    assert _rows(db, marker) == original
+
+
+def test_export_header_matches_import_columns(db):
+    header = b"".join(crud.export_transactions(db, format="csv", search="nada")).decode()
+    assert header.strip().split(",") == EXPORT_COLUMNS
@@ -0,0 +1,76 @@
+from datetime import date
+from app import crud, schemas
+from app.crud.goal import _limit_goal_spending
+
+
+def _saving_goals(db, count):
+    return [
+        crud.create_goal(db, schemas.GoalCreate(
+            name=f"Reserva {i}", type="saving", target_amount=1000, period="deadline",
+        ))
+        for i in range(count)
+    ]
+
+
+def test_add_goal_contributions_query_count_is_constant(db, count_queries):
+    goal_ids = [goal.id for goal in _saving_goals(db, 20)]
+
+    def contribute(goal_ids):
+        return crud.add_goal_contributions(db, [
+            schemas.GoalContributionCreate(goal_id=goal_id, amount=amount)
+            for goal_id in goal_ids for amount in (10, 5)
+        ])
+
+    with count_queries() as few:
+        contribute(goal_ids[:2])
+    with count_queries() as many:
+        updated = contribute(goal_ids)
+
+    assert len(many) == len(few)
+    assert [goal.current_amount for goal in updated[:2]] == [30, 30]
+    assert {goal.current_amount for goal in updated[2:]} == {15}
+
+
+def test_limit_goal_spending_query_count_is_constant(db, count_queries):
+    today = date.today()
+    month_start = today.replace(day=1)
+    categories = [
+        crud.create_category(db, schemas.CategoryCreate(name=f"Orçamento {i}"))
+        for i in range(20)
+    ]
+    crud.bulk_create_transactions(db, [
+        schemas.TransactionBulkItem(
+            description=f"Gasto orçamento {i}", value=i + 1, type="expense",
+            category_name=category.name, date=today,
+        )
+        for i, category in enumerate(categories)
+    ])
+    ids = [category.id for category in categories]
+
+    with count_queries() as few:
+        _limit_goal_spending(db, set(ids[:2]), month_start, today)
+    with count_queries() as many:
+        spending = _limit_goal_spending(db, set(ids), month_start, today)
+
+    assert len(many) == len(few) == 1
+    assert spending == {category_id: (i + 1, i + 1) for i, category_id in enumerate(ids)}
+
+
+def test_goals_page_query_count_is_constant(db, count_queries):
+    category = crud.create_category(db, schemas.CategoryCreate(name="Lazer metas"))
+
+    def add_limit_goals(count):
+        for i in range(count):
+            crud.create_goal(db, schemas.GoalCreate(
+                name=f"Limite {i}", type="limit", target_amount=500,
+                period="monthly", category_id=category.id,
+            ))
+
+    add_limit_goals(2)
+    with count_queries() as few:
+        crud.get_goals_page_data(db)
+    add_limit_goals(20)
+    with count_queries() as many:
+        crud.get_goals_page_data(db)
+
+    assert len(many) == len(few)
@@ -0,0 +1,109 @@
+import os
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from app import crud
+from app.crud.importer import IMPORT_JOB_LEASE_SECONDS, _brl_to_float, _parse_values
+
+
+def test_blank_value_rejects_only_that_row(db):
+    content = "\n".join([
+        "Data,Descrição,Valor,Tipo",
+        '01/02/2024,Valor em branco A,"10,50",expense',
+        "02/02/2024,Valor em branco B,,expense",
+        '03/02/2024,Valor em branco C,"R$ 1.234,56",income',
+    ]).encode()
+
+    result = crud.process_import_file(db, content, "extrato.csv")
+
+    assert result["rows_imported"] == 2
+    assert result["rejected_rows"] == [{"row": 3, "reason": "valor inválido"}]
+    rows = crud.get_all_transactions(db, search="Valor em branco")["transactions"]
+    assert sorted(row.value for row in rows) == [10.5, 1234.56]
+
+
+def test_line_break_inside_a_value_does_not_shift_the_column():
+    values = _brl_to_float(["10\n20", " ", "R$ 5,00", "7\r"])
+    assert np.isnan(values[0]) and np.isnan(values[1])
+    assert values[2] == 5.0 and values[3] == 7.0
+
+
+def test_numeric_cells_skip_brl_cleaning():
+    # Números do Excel já vêm como float: "1234.5" não perde o ponto decimal
+    column = pd.Series([1234.5, "1.234,56", 10], dtype=object)
+    assert _parse_values(column).tolist() == [1234.5, 1234.56, 10.0]
+
+
+def test_only_jobs_with_an_expired_lease_are_marked_failed(db):
+    stale = datetime.now(timezone.utc) - timedelta(seconds=IMPORT_JOB_LEASE_SECONDS + 60)
+    jobs = {
+        name: crud.create_import_job(db, file_name=f"{name}.csv")
+        for name in ("pending", "running", "alive", "done")
+    }
+    jobs["pending"].heartbeat_at = stale
+    jobs["running"].status = "running"
+    jobs["running"].heartbeat_at = stale
+    jobs["alive"].status = "running"  # Outro worker, ainda renovando o lease
+    jobs["done"].status = "done"
+    jobs["done"].heartbeat_at = stale
+    db.commit()
+
+    assert crud.fail_interrupted_import_jobs(db) == 2
+
+    statuses = {}
+    for name, job in jobs.items():
+        db.refresh(job)
+        statuses[name] = job.status
+    assert statuses == {
+        "pending": "failed", "running": "failed", "alive": "running", "done": "done",
+    }
+    assert jobs["running"].error and jobs["running"].finished_at is not None
+    jobs["alive"].status = "done"
+    db.commit()
+
+
+def test_import_job_progress_renews_the_lease(db, tmp_path):
+    path = tmp_path / "extrato.csv"
+    path.write_text("Data,Descricao,Valor,Tipo\n2024-05-02,Lease,10,expense\n")
+    job = crud.create_import_job(db, file_name="extrato.csv")
+    queued = crud.create_import_job(db, file_name="fila.csv")  # Na fila do mesmo processo
+    stale = datetime.now(timezone.utc) - timedelta(seconds=IMPORT_JOB_LEASE_SECONDS + 60)
+    job.heartbeat_at = queued.heartbeat_at = stale
+    db.commit()
+
+    crud.run_import_job(db, job.id, str(path), "extrato.csv")
+
+    assert crud.fail_interrupted_import_jobs(db) == 0
+    db.refresh(job)
+    db.refresh(queued)
+    assert job.status == "done" and job.owner == queued.owner
+    assert queued.status == "pending"
+    queued.status = "done"
+    db.commit()
+
+
+def test_upload_removes_spooled_file_when_job_creation_fails(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import jobs
+    from app.main import app
+
+    spooled = []
+    spool_upload = jobs.spool_upload
+
+    def recording_spool_upload(source, suffix):
+        spooled.append(spool_upload(source, suffix))
+        return spooled[-1]
+
+    monkeypatch.setattr(jobs, "spool_upload", recording_spool_upload)
+
+    def create_import_job(db, file_name):
+        raise RuntimeError("banco indisponível")
+
+    monkeypatch.setattr(crud, "create_import_job", create_import_job)
+
+    response = TestClient(app).post(
+        "/api/import/", files={"file": ("extrato.csv", b"Data,Descricao,Valor,Tipo\n")}
+    )
+
+    assert response.status_code == 500
+    assert len(spooled) == 1 and not os.path.exists(spooled[0])
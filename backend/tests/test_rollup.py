@@ -0,0 +1,102 @@
+from collections import defaultdict
+from datetime import date
+from app import crud, models, schemas
+
+MARKER = "Agregado"
+
+
+def _expected(db):
+    """GROUP BY sobre as transações, nas chaves de daily_totals e monthly_totals."""
+    daily = defaultdict(lambda: [0.0, 0])
+    monthly = defaultdict(lambda: [0.0, 0])
+    for tx_date, tx_type, category_id, value in db.query(
+        models.Transaction.date, models.Transaction.type,
+        models.Transaction.category_id, models.Transaction.value,
+    ):
+        for totals, key in (
+            (daily, (tx_date, tx_type, category_id)),
+            (monthly, (tx_date.replace(day=1), tx_type)),
+        ):
+            totals[key][0] += value
+            totals[key][1] += 1
+    return daily, monthly
+
+
+def _rounded(totals):
+    return {key: (round(total, 6), count) for key, (total, count) in totals.items()}
+
+
+def assert_rollups_match(db):
+    db.expire_all()
+    daily, monthly = _expected(db)
+    stored_daily = {
+        (row.date, row.type, row.category_id): (row.total, row.count)
+        for row in db.query(models.DailyTotal)
+    }
+    stored_monthly = {
+        (row.month, row.type): (row.total, row.count) for row in db.query(models.MonthlyTotal)
+    }
+    # Uma linha por chave (sem categoria inclusive) e nenhuma zerada sobrando
+    assert db.query(models.DailyTotal).count() == len(stored_daily)
+    assert _rounded(stored_daily) == _rounded(daily)
+    assert _rounded(stored_monthly) == _rounded(monthly)
+
+
+def _ids(db, search):
+    return [row.id for row in crud.get_all_transactions(db, search=search, limit=100)["transactions"]]
+
+
+def test_rollups_follow_every_kind_of_write(db):
+    crud.create_category(db, schemas.CategoryCreate(name="Agregado Mercado"))
+    assert_rollups_match(db)
+
+    entry = crud.create_quick_entry(db, schemas.TransactionQuickCreate(
+        description=f"{MARKER} rapida", value=12.5, type="expense",
+    ))
+    assert_rollups_match(db)
+
+    # PUT: tipo e categoria (sem categoria -> com categoria) mudam a chave da linha
+    crud.update_transaction(db, entry.id, schemas.TransactionUpdate(
+        value=30.0, type="income", category_name="Agregado Mercado",
+    ))
+    assert_rollups_match(db)
+
+    crud.bulk_create_transactions(db, [
+        schemas.TransactionBulkItem(
+            description=f"{MARKER} lote {i}", value=5.0 + i, type="expense",
+            category_name="Agregado Mercado" if i % 2 else None,
+            date=date(2023, 7, 1 + i % 3),
+        )
+        for i in range(8)
+    ])
+    assert_rollups_match(db)
+
+    lote = schemas.TransactionSelection(search=f"{MARKER} lote")
+    crud.bulk_update_transactions(db, lote, schemas.TransactionBulkChanges(value=2.0, date=date(2023, 8, 2)))
+    assert_rollups_match(db)
+
+    # Sem categoria: a chave (dia, tipo, NULL) passa por rollup_category_key
+    crud.bulk_recategorize_transactions(db, lote, None)
+    assert_rollups_match(db)
+    crud.bulk_recategorize_transactions(
+        db, schemas.TransactionSelection(ids=_ids(db, f"{MARKER} lote")[:3]), "Agregado Mercado"
+    )
+    assert_rollups_match(db)
+
+    crud.delete_transaction(db, entry.id)
+    assert_rollups_match(db)
+
+    crud.bulk_delete_transactions(db, schemas.TransactionSelection(ids=_ids(db, f"{MARKER} lote")[:4]))
+    assert_rollups_match(db)
+
+    content = "\n".join([
+        "Data,Descrição,Valor,Tipo",
+        f'02/08/2023,{MARKER} importado A,"10,00",expense',
+        f'02/08/2023,{MARKER} importado B,"1.000,00",income',
+        f'31/12/2023,{MARKER} importado C,"7,25",expense',
+    ]).encode()
+    crud.process_import_file(db, content, "agregado.csv")
+    assert_rollups_match(db)
+
+    crud.bulk_delete_transactions(db, schemas.TransactionSelection(search=MARKER))
+    assert_rollups_match(db)
@@ -0,0 +1,97 @@
+from datetime import date
+import pytest
+from sqlalchemy import text
+from app import crud, schemas, search_index
+
+# Um mês só para cada backend: os filtros de mês isolam as linhas do teste
+MONTHS = {"fts5": date(1999, 3, 1), "like": date(1999, 4, 1)}
+
+
+@pytest.fixture(params=["fts5", "like"])
+def backend(request, db, monkeypatch):
+    # O banco de testes tem o índice FTS5; "like" é o fallback sem índice
+    assert search_index.SEARCH_BACKEND == "fts5"
+    monkeypatch.setattr(search_index, "SEARCH_BACKEND", request.param)
+    month = MONTHS[request.param]
+    crud.bulk_create_transactions(db, [
+        schemas.TransactionBulkItem(description=description, value=10.0, type="expense", date=month)
+        for description in ("Café São João", "Açougue Boi Bravo", "Farmácia Popular")
+    ])
+    yield request.param, month.strftime("%Y-%m")
+    crud.bulk_delete_transactions(db, schemas.TransactionSelection(month_year=month.strftime("%Y-%m")))
+
+
+def _search(db, month_year, term):
+    rows = crud.get_all_transactions(db, search=term, month_year=month_year)["transactions"]
+    return sorted(row.description for row in rows)
+
+
+def _check_fts_index(db):
+    # Confere o índice externo contra a tabela transactions (erro se divergir)
+    db.execute(text("INSERT INTO transactions_fts(transactions_fts) VALUES ('integrity-check')"))
+
+
+def test_search_ignores_accents_and_case(db, backend):
+    _, month_year = backend
+    assert _search(db, month_year, "cafe sao") == ["Café São João"]
+    assert _search(db, month_year, "AÇOUGUE") == ["Açougue Boi Bravo"]
+    assert _search(db, month_year, "farmacia") == ["Farmácia Popular"]
+    assert _search(db, month_year, "mercado") == []
+
+
+def test_trigram_index_or_like_depending_on_term_length(db, backend, count_queries):
+    name, month_year = backend
+    with count_queries() as long_term:
+        assert _search(db, month_year, "joao") == ["Café São João"]
+    with count_queries() as short_term:
+        # Abaixo de TRIGRAM_MIN_LENGTH o trigram não encontra nada: vai por LIKE
+        assert _search(db, month_year, "bo") == ["Açougue Boi Bravo"]
+
+    uses_fts = lambda statements: any("transactions_fts MATCH" in s for s in statements)
+    assert uses_fts(long_term) == (name == "fts5")
+    assert not uses_fts(short_term)
+    assert any("LIKE" in s for s in short_term)
+
+
+def test_index_follows_updates_and_deletes(db, backend):
+    _, month_year = backend
+    rows = crud.get_all_transactions(db, search="cafe", month_year=month_year)["transactions"]
+    cafe_id = rows[0].id
+
+    crud.update_transaction(db, cafe_id, schemas.TransactionUpdate(description="Padaria Pão Quente"))
+    assert _search(db, month_year, "cafe") == []
+    assert _search(db, month_year, "padaria pao") == ["Padaria Pão Quente"]
+
+    crud.bulk_update_transactions(
+        db,
+        schemas.TransactionSelection(search="farmacia", month_year=month_year),
+        schemas.TransactionBulkChanges(description="Drogaria Saúde"),
+    )
+    assert _search(db, month_year, "farmacia") == []
+    assert _search(db, month_year, "saude") == ["Drogaria Saúde"]
+
+    crud.delete_transaction(db, cafe_id)
+    assert _search(db, month_year, "padaria") == []
+    crud.bulk_delete_transactions(
+        db, schemas.TransactionSelection(search="drogaria", month_year=month_year)
+    )
+    assert _search(db, month_year, "drogaria") == []
+    assert _search(db, month_year, "boi") == ["Açougue Boi Bravo"]
+
+    _check_fts_index(db)
+
+
+def test_missing_search_index_falls_back_to_like_with_a_warning(monkeypatch, caplog):
+    class BrokenEngine:
+        class dialect:
+            name = "sqlite"
+
+        def begin(self):
+            raise RuntimeError("no such module: fts5")
+
+    monkeypatch.setattr(search_index, "SEARCH_BACKEND", search_index.SEARCH_BACKEND)
+    with caplog.at_level("WARNING", logger="app.search_index"):
+        search_index.ensure_search_index(BrokenEngine())
+
+    assert search_index.SEARCH_BACKEND == "like"
+    assert "no such module: fts5" in caplog.text
@@ -0,0 +1,76 @@
+import base64
+from datetime import date
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app import crud, schemas
+from app.crud.transaction import encode_cursor, decode_cursor
+from app.main import app
+
+
+def _create(db, marker, dates):
+    crud.bulk_create_transactions(db, [
+        schemas.TransactionBulkItem(
+            description=f"{marker} {i}", value=i + 1.0, type="expense", date=tx_date
+        )
+        for i, tx_date in enumerate(dates)
+    ])
+
+
+def _pages(db, search, limit):
+    pages, cursor = [], None
+    while True:
+        page = crud.get_all_transactions(db, search=search, limit=limit, cursor=cursor)
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(date(2024, 1, 10), 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (date(2024, 1, 10), 42)
+
+
+def test_pages_split_inside_a_run_of_equal_dates(db):
+    # Vários lançamentos no mesmo dia: as fronteiras das páginas caem no meio
+    # deles, e o desempate por id não pode pular nem repetir linhas
+    marker = "Keyset mesmo dia"
+    _create(db, marker, [date(2024, 1, 10)] * 5 + [date(2024, 1, 9)] * 2 + [date(2024, 1, 11)])
+    everything = crud.get_all_transactions(db, search=marker, limit=100)["transactions"]
+    expected = [(row.date, row.id) for row in everything]
+    assert expected == sorted(expected, reverse=True) and len(expected) == 8
+
+    pages = _pages(db, marker, limit=3)
+
+    paged = [(row.date, row.id) for page in pages for row in page["transactions"]]
+    assert paged == expected
+    assert [len(page["transactions"]) for page in pages] == [3, 3, 2]
+
+
+def test_last_full_page_has_no_next_cursor(db):
+    marker = "Keyset pagina cheia"
+    _create(db, marker, [date(2024, 2, 1)] * 4)
+
+    pages = _pages(db, marker, limit=2)
+
+    assert [len(page["transactions"]) for page in pages] == [2, 2]
+    assert pages[0]["next_cursor"] is not None
+    assert pages[-1]["next_cursor"] is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "!!!",
+    base64.urlsafe_b64encode(b"2024-01-10").decode(),  # Sem o id
+    base64.urlsafe_b64encode(b"ontem_3").decode(),
+    base64.urlsafe_b64encode(b"2024-01-10_x").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe_1").decode(),
+])
+def test_malformed_cursor_is_a_400(db, cursor):
+    with pytest.raises(HTTPException) as error:
+        crud.get_all_transactions(db, cursor=cursor)
+    assert error.value.status_code == 400
+
+    response = TestClient(app).get("/api/transactions/all", params={"cursor": cursor})
+    assert response.status_code == 400
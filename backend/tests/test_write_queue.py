@@ -0,0 +1,27 @@
+from app.database import WriteQueue
+
+
+def _queue_order(queue, foreground, background):
+    """Enfileira (com a vez ocupada) e devolve a ordem em que cada um é servido."""
+    order = []
+    assert queue._acquire_or_enqueue(lambda: None)
+    for name in background:
+        queue._acquire_or_enqueue(lambda name=name: order.append(name), background=True)
+    for name in foreground:
+        queue._acquire_or_enqueue(lambda name=name: order.append(name))
+    for _ in range(len(foreground) + len(background) + 1):
+        queue._release()
+    assert not queue._busy
+    return order
+
+
+def test_foreground_goes_first_until_the_burst_limit():
+    queue = WriteQueue(enabled=True, foreground_burst=3, background_max_wait=60)
+    order = _queue_order(queue, ["f1", "f2", "f3", "f4", "f5"], ["b1", "b2"])
+    assert order == ["f1", "f2", "f3", "b1", "f4", "f5", "b2"]
+
+
+def test_background_waiting_too_long_gets_the_next_turn():
+    queue = WriteQueue(enabled=True, foreground_burst=100, background_max_wait=0)
+    order = _queue_order(queue, ["f1", "f2", "f3"], ["b1", "b2"])
+    assert order == ["f1", "b1", "f2", "b2", "f3"]
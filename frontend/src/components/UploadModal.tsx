@@ -5,6 +5,7 @@ import axios, { isAxiosError } from "axios";
 
 // Importa a URL centralizada
 import { API_URL } from "../config";
+import { waitForImportJob } from "../importJobs";
 
 // Constrói a URL específica do endpoint
 const IMPORT_ENDPOINT = `${API_URL}/import/`;
@@ -24,6 +25,7 @@ export function UploadModal({
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [isUploading, setIsUploading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [progress, setProgress] = useState<string | null>(null);
 
   const handleFileChange = (event: ChangeEvent<HTMLInputElement>) => {
     if (event.target.files && event.target.files[0]) {
@@ -52,7 +54,16 @@ export function UploadModal({
         },
       });
 
-      console.log("Upload bem-sucedido:", response.data);
+      // O backend devolve um job; a importação roda em segundo plano
+      const job = await waitForImportJob(response.data.id, (current) =>
+        setProgress(`${current.rows_parsed} linhas processadas...`)
+      );
+      if (job.status === "failed") {
+        setError(job.error || "Erro desconhecido no backend.");
+        return;
+      }
+
+      console.log("Upload bem-sucedido:", job);
       onUploadSuccess(); // Avisa o App.tsx para recarregar os dados
       handleClose(); // Fecha o modal
     } catch (err) {
@@ -67,6 +78,7 @@ export function UploadModal({
       }
     } finally {
       setIsUploading(false);
+      setProgress(null);
     }
   };
 
@@ -74,6 +86,7 @@ export function UploadModal({
     // Reseta o estado ao fechar
     setSelectedFile(null);
     setError(null);
+    setProgress(null);
     setIsUploading(false);
     onClose();
   };
@@ -104,6 +117,11 @@ export function UploadModal({
         {/* Mensagem de Erro (AGORA VAI MOSTRAR O ERRO REAL) */}
         {error && <p className="text-red-400 text-sm mt-2">{error}</p>}
 
+        {/* Progresso da importação em segundo plano */}
+        {progress && (
+          <p className="text-text-secondary text-sm mt-2">{progress}</p>
+        )}
+
         {/* Prévia do arquivo selecionado */}
         {selectedFile && (
           <p className="text-text-secondary text-sm mt-2">
@@ -0,0 +1,35 @@
+import axios from "axios";
+
+import { API_URL } from "./config";
+
+export interface ImportJob {
+  id: number;
+  file_name: string | null;
+  status: "pending" | "running" | "done" | "failed";
+  rows_parsed: number;
+  rows_imported: number;
+  rows_skipped: number;
+  rows_rejected: number;
+  error: string | null;
+  elapsed_seconds: number | null;
+}
+
+const POLL_INTERVAL_MS = 1000;
+
+// Acompanha um job de importação até ele terminar (done/failed)
+export async function waitForImportJob(
+  jobId: number,
+  onProgress?: (job: ImportJob) => void
+): Promise<ImportJob> {
+  for (;;) {
+    const response = await axios.get<ImportJob>(
+      `${API_URL}/import/jobs/${jobId}`
+    );
+    const job = response.data;
+    onProgress?.(job);
+    if (job.status === "done" || job.status === "failed") {
+      return job;
+    }
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+  }
+}
@@ -17,6 +17,15 @@ interface Category {
   keywords: string; // Garantido como string após a correção do backend
 }
 
+// Resultado de /transactions/retag (prévia ou aplicação)
+interface RetagResult {
+  dry_run: boolean;
+  scanned: number;
+  matched: number;
+  categories: { category_id: number; category_name: string | null; count: number }[];
+  elapsed_ms: number;
+}
+
 // --- FUNÇÃO AUXILIAR PARA LER DO LOCALSTORAGE ---
 function getInitialState(key: string, defaultValue: boolean): boolean {
   const saved = localStorage.getItem(key);
@@ -58,6 +67,10 @@ export function ConfigPage() {
 
   const [error, setError] = useState<string | null>(null);
 
+  // Reaplicação das palavras-chave nas transações sem categoria
+  const [retagResult, setRetagResult] = useState<RetagResult | null>(null);
+  const [retagRunning, setRetagRunning] = useState(false);
+
   // NOVOS ESTADOS PARA O MODAL
   const [isCategoryModalOpen, setIsCategoryModalOpen] = useState(false);
   const [editingCategory, setEditingCategory] = useState<Category | null>(null);
@@ -119,6 +132,23 @@ export function ConfigPage() {
     handleCloseModal();
   };
 
+  // 7. REAPLICAR PALAVRAS-CHAVE (dryRun = só a prévia)
+  const handleRetag = async (dryRun: boolean) => {
+    setRetagRunning(true);
+    setError(null);
+    try {
+      const response = await axios.post(`${API_URL}/transactions/retag`, {
+        dry_run: dryRun,
+      });
+      setRetagResult(response.data);
+    } catch (err) {
+      console.error("Erro ao reaplicar palavras-chave:", err);
+      setError("Falha ao reaplicar as palavras-chave.");
+    } finally {
+      setRetagRunning(false);
+    }
+  };
+
   // 6. FUNÇÃO DE FECHAR MODAL
   const handleCloseModal = () => {
     setIsCategoryModalOpen(false);
@@ -392,6 +422,47 @@ export function ConfigPage() {
                     </button>
                   </div>
 
+                  {/* Reaplicar palavras-chave nas transações sem categoria */}
+                  <div className="border-b border-white/10 py-6 space-y-3">
+                    <p className="text-text-secondary text-sm">
+                      Aplica as palavras-chave às transações que ainda estão sem
+                      categoria.
+                    </p>
+                    <div className="flex gap-3">
+                      <button
+                        onClick={() => handleRetag(true)}
+                        disabled={retagRunning}
+                        className="flex-1 px-4 py-2 text-sm font-medium text-white bg-white/10 rounded-lg hover:bg-white/20 disabled:opacity-50"
+                      >
+                        Ver prévia
+                      </button>
+                      <button
+                        onClick={() => handleRetag(false)}
+                        disabled={retagRunning || !retagResult?.dry_run || retagResult.matched === 0}
+                        className="flex-1 px-4 py-2 text-sm font-bold text-accent-dark bg-primary rounded-lg hover:bg-opacity-90 disabled:opacity-50"
+                      >
+                        Aplicar
+                      </button>
+                    </div>
+                    {retagRunning && (
+                      <p className="text-text-secondary text-sm">Processando...</p>
+                    )}
+                    {retagResult && !retagRunning && (
+                      <div className="text-sm text-text-secondary space-y-1">
+                        <p>
+                          {retagResult.matched} de {retagResult.scanned} transações sem
+                          categoria {retagResult.dry_run ? "seriam categorizadas" : "categorizadas"}.
+                        </p>
+                        {retagResult.categories.map((item) => (
+                          <p key={item.category_id} className="flex justify-between">
+                            <span className="text-white">{item.category_name}</span>
+                            <span>{item.count}</span>
+                          </p>
+                        ))}
+                      </div>
+                    )}
+                  </div>
+
                   {/* Mensagem de Erro da API */}
                   {error && (
                     <p className="text-negative text-sm mt-4 text-center">
@@ -67,6 +67,8 @@ interface TransactionDetail {
 
 // A definição local de API_URL foi REMOVIDA daqui pois já importamos do config.ts
 
+const MAX_CHART_POINTS = 365;
+
 const PIE_COLORS = ["#ff4560", "#008FFB", "#FEB019", "#775DD0"];
 
 // --- INÍCIO DO COMPONENTE ---
@@ -131,24 +133,19 @@ export function HomePage() {
     if (endDate) {
       params.append("end_date", format(endDate, "yyyy-MM-dd"));
     }
+    // Limita os pontos do gráfico de linha (o backend reduz a série por LTTB)
+    params.append("max_points", String(MAX_CHART_POINTS));
     const queryString = params.toString();
 
     try {
-      const [kpiRes, pieRes, lineRes, recentRes] = await Promise.all([
-        // 6. Envia os parâmetros para TODOS os endpoints
-        axios.get(`${API_URL}/dashboard/kpis/?${queryString}`),
-        axios.get(
-          `${API_URL}/dashboard/chart/expenses-by-category?${queryString}`
-        ),
-        axios.get(
-          `${API_URL}/dashboard/chart/balance-over-time?${queryString}`
-        ),
-        axios.get(`${API_URL}/transactions/recent?${queryString}`),
-      ]);
-      setKpis(kpiRes.data);
-      setPieData(pieRes.data);
-      setLineData(lineRes.data);
-      setRecentTransactions(recentRes.data);
+      // Uma única chamada (uma conexão no backend) traz as quatro seções
+      const response = await axios.get(
+        `${API_URL}/dashboard/bundle?${queryString}`
+      );
+      setKpis(response.data.kpis);
+      setPieData(response.data.expenses_by_category);
+      setLineData(response.data.balance_over_time);
+      setRecentTransactions(response.data.recent_transactions);
       setError(null);
     } catch (err) {
       setError(
@@ -16,12 +16,15 @@ import { QuickEntryModal } from "../components/QuickEntryModal";
 
 // Importa a URL centralizada
 import { API_URL } from "../config";
+import { waitForImportJob } from "../importJobs";
 
 // --- URLs da API ---
 // Agora construídas dinamicamente com base no config
 const API_IMPORT_URL = `${API_URL}/import/`;
 const API_TRANSACTIONS_URL = `${API_URL}/transactions`;
 const API_MONTHS_URL = `${API_URL}/transactions/months`;
+// Transações por página (o backend pagina por cursor)
+const PAGE_SIZE = 100;
 
 // --- DEFINIÇÃO DOS TIPOS ---
 interface Transaction {
@@ -37,6 +40,7 @@ interface Summary {
   total_expense: number;
   total_investment: number;
   balance: number;
+  transaction_count: number;
 }
 interface Filters {
   search: string;
@@ -80,6 +84,9 @@ export function ImportarPage() {
   // --- ESTADOS DA TABELA DE HISTÓRICO ---
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [summary, setSummary] = useState<Summary | null>(null);
+  // Cursor da próxima página (null = não há mais transações)
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filters, setFilters] = useState<Filters>({
     search: "",
     type: "all",
@@ -103,19 +110,28 @@ export function ImportarPage() {
   const fileInputRef = useRef<HTMLInputElement>(null);
 
   // --- FUNÇÕES DE BUSCA DE DADOS (HISTÓRICO) ---
-  const fetchTransactions = useCallback(async () => {
-    setLoading(true);
-    try {
+  const buildParams = useCallback(
+    (cursor?: string) => {
       const params = new URLSearchParams();
       if (filters.search) params.append("search", filters.search);
       if (filters.type !== "all") params.append("type", filters.type);
       if (filters.month_year) params.append("month_year", filters.month_year);
+      params.append("limit", String(PAGE_SIZE));
+      if (cursor) params.append("cursor", cursor);
+      return params;
+    },
+    [filters]
+  );
 
+  const fetchTransactions = useCallback(async () => {
+    setLoading(true);
+    try {
       const response = await axios.get(`${API_TRANSACTIONS_URL}/all`, {
-        params,
+        params: buildParams(),
       });
       setTransactions(response.data.transactions);
       setSummary(response.data.summary);
+      setNextCursor(response.data.next_cursor);
       setTableError(null);
     } catch (err) {
       console.error(err); // O 'err' é usado aqui
@@ -123,7 +139,25 @@ export function ImportarPage() {
     } finally {
       setLoading(false);
     }
-  }, [filters]);
+  }, [buildParams]);
+
+  // Próxima página (keyset): adiciona ao fim da tabela
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API_TRANSACTIONS_URL}/all`, {
+        params: buildParams(nextCursor),
+      });
+      setTransactions((prev) => [...prev, ...response.data.transactions]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      console.error(err);
+      setTableError("Falha ao buscar transações.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   const fetchMonths = async () => {
     try {
@@ -171,8 +205,17 @@ export function ImportarPage() {
       const response = await axios.post(API_IMPORT_URL, formData, {
         headers: { "Content-Type": "multipart/form-data" },
       });
+      // A importação roda em segundo plano: acompanha o job até terminar
+      const job = await waitForImportJob(response.data.id, (current) =>
+        setUploadSuccess(`Importando... ${current.rows_parsed} linhas processadas.`)
+      );
+      if (job.status === "failed") {
+        setUploadSuccess(null);
+        setUploadError(job.error || "Erro desconhecido no backend.");
+        return;
+      }
       setUploadSuccess(
-        `Sucesso! ${response.data.rows_imported} linhas importadas.`
+        `Sucesso! ${job.rows_imported} linhas importadas.`
       );
       setSelectedFile(null); // Limpa o arquivo
       // Recarrega a tabela e os meses
@@ -489,21 +532,21 @@ export function ImportarPage() {
               </div>
               <div className="flex items-center justify-between border-t border-primary/20 px-6 py-3">
                 <p className="text-sm text-gray-500">
-                  Mostrando 1–{transactions.length} de {transactions.length}{" "}
-                  registros
+                  Mostrando 1–{transactions.length} de{" "}
+                  {summary?.transaction_count ?? transactions.length} registros
                 </p>
-                <div className="flex items-center gap-2">
-                  <button className="flex h-8 w-8 items-center justify-center rounded-md text-gray-500 hover:bg-gray-800 hover:text-white">
+                {nextCursor && (
+                  <button
+                    onClick={loadMore}
+                    disabled={loadingMore}
+                    className="flex h-8 items-center gap-1 rounded-md px-3 text-sm text-gray-500 hover:bg-gray-800 hover:text-white disabled:opacity-50"
+                  >
+                    {loadingMore ? "Carregando..." : "Carregar mais"}
                     <span className="material-symbols-outlined">
-                      chevron_left
+                      expand_more
                     </span>
                   </button>
-                  <button className="flex h-8 w-8 items-center justify-center rounded-md text-gray-500 hover:bg-gray-800 hover:text-white">
-                    <span className="material-symbols-outlined">
-                      chevron_right
-                    </span>
-                  </button>
-                </div>
+                )}
               </div>
             </div>
           </section>
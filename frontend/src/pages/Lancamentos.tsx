@@ -12,6 +12,9 @@ import { QuickEntryModal } from "../components/QuickEntryModal";
 // Importa a URL centralizada
 import { API_URL } from "../config";
 
+// Transações por página (o backend pagina por cursor)
+const PAGE_SIZE = 100;
+
 // --- DEFINIÇÃO DOS TIPOS ---
 interface Transaction {
   id: number;
@@ -27,6 +30,12 @@ interface Summary {
   total_expense: number;
   total_investment: number;
   balance: number;
+  transaction_count: number;
+}
+
+interface Category {
+  id: number;
+  name: string;
 }
 
 interface Filters {
@@ -42,6 +51,9 @@ export function LancamentosPage() {
   // --- ESTADOS (State) ---
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [summary, setSummary] = useState<Summary | null>(null);
+  // Cursor da próxima página (null = não há mais transações)
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filters, setFilters] = useState<Filters>({
     search: "",
     type: "all",
@@ -59,24 +71,49 @@ export function LancamentosPage() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
+  // Seleção para as ações em lote
+  const [selectedIds, setSelectedIds] = useState<Set<number>>(new Set());
+  const [categories, setCategories] = useState<Category[]>([]);
+  const [bulkCategory, setBulkCategory] = useState("");
+  const [bulkRunning, setBulkRunning] = useState(false);
+
   // --- FUNÇÕES DE BUSCA DE DADOS ---
 
-  // Busca a lista de transações
-  const fetchTransactions = useCallback(async () => {
-    setLoading(true);
-    try {
+  // Monta os parâmetros de filtro (e o cursor, ao carregar mais páginas)
+  const buildParams = useCallback(
+    (cursor?: string) => {
       const params = new URLSearchParams();
       if (filters.search) params.append("search", filters.search);
       if (filters.type !== "all") params.append("type", filters.type);
       if (filters.month_year) params.append("month_year", filters.month_year);
+      params.append("limit", String(PAGE_SIZE));
+      if (cursor) params.append("cursor", cursor);
+      return params;
+    },
+    [filters]
+  );
+
+  // Mesmos filtros da listagem, sem paginação
+  const exportParams = new URLSearchParams();
+  if (filters.search) exportParams.append("search", filters.search);
+  if (filters.type !== "all") exportParams.append("type", filters.type);
+  if (filters.month_year) exportParams.append("month_year", filters.month_year);
+  exportParams.append("format", "csv");
+  const exportUrl = `${API_URL}/transactions/export?${exportParams.toString()}`;
 
+  // Busca a primeira página de transações
+  const fetchTransactions = useCallback(async () => {
+    setLoading(true);
+    try {
       // Atualizado para usar API_URL do config
       const response = await axios.get(`${API_URL}/transactions/all`, {
-        params,
+        params: buildParams(),
       });
 
       setTransactions(response.data.transactions);
       setSummary(response.data.summary);
+      setNextCursor(response.data.next_cursor);
+      setSelectedIds(new Set());
       setError(null);
     } catch (err) {
       console.error(err);
@@ -84,7 +121,25 @@ export function LancamentosPage() {
     } finally {
       setLoading(false);
     }
-  }, [filters]); // Depende dos filtros
+  }, [buildParams]); // Depende dos filtros
+
+  // Busca a próxima página e adiciona ao fim da tabela
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API_URL}/transactions/all`, {
+        params: buildParams(nextCursor),
+      });
+      setTransactions((prev) => [...prev, ...response.data.transactions]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      console.error(err);
+      setError("Falha ao buscar transações.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   // Busca os meses disponíveis (só 1 vez)
   const fetchMonths = async () => {
@@ -97,6 +152,16 @@ export function LancamentosPage() {
     }
   };
 
+  // Busca as categorias para a recategorização em lote (só 1 vez)
+  const fetchCategories = async () => {
+    try {
+      const response = await axios.get(`${API_URL}/categories/`);
+      setCategories(response.data);
+    } catch (err) {
+      console.error("Erro ao buscar categorias:", err);
+    }
+  };
+
   // --- EFEITOS (Triggers) ---
 
   // Roda a busca principal sempre que os filtros mudam
@@ -110,6 +175,7 @@ export function LancamentosPage() {
   // Roda a busca de meses SÓ UMA VEZ quando a página carrega
   useEffect(() => {
     fetchMonths();
+    fetchCategories();
   }, []); // Array vazio = roda 1 vez
 
   // --- FUNÇÕES DE AÇÃO (Handlers) ---
@@ -161,6 +227,57 @@ export function LancamentosPage() {
     setEditingTransaction(transaction);
   };
 
+  // --- AÇÕES EM LOTE ---
+  const toggleSelected = (transactionId: number) => {
+    setSelectedIds((prev) => {
+      const next = new Set(prev);
+      if (next.has(transactionId)) next.delete(transactionId);
+      else next.add(transactionId);
+      return next;
+    });
+  };
+
+  const allSelected =
+    transactions.length > 0 && transactions.every((tx) => selectedIds.has(tx.id));
+
+  const toggleSelectAll = () => {
+    setSelectedIds(
+      allSelected ? new Set() : new Set(transactions.map((tx) => tx.id))
+    );
+  };
+
+  // Uma única requisição para todas as selecionadas
+  const runBulkAction = async (action: "recategorize" | "delete") => {
+    setBulkRunning(true);
+    try {
+      const ids = Array.from(selectedIds);
+      await axios.post(
+        `${API_URL}/transactions/bulk/${action}`,
+        action === "recategorize"
+          ? { ids, category_name: bulkCategory || null }
+          : { ids }
+      );
+      fetchTransactions();
+      fetchMonths();
+    } catch (err) {
+      console.error(err);
+      setError("Falha ao aplicar a ação em lote.");
+    } finally {
+      setBulkRunning(false);
+    }
+  };
+
+  const handleBulkDelete = () => {
+    if (
+      !window.confirm(
+        `Tem certeza que deseja apagar ${selectedIds.size} lançamentos?`
+      )
+    ) {
+      return;
+    }
+    runBulkAction("delete");
+  };
+
   // Formata o mês "YYYY-MM" para "Outubro / 2024"
   const formatMonthYear = (monthString: string) => {
     try {
@@ -221,6 +338,14 @@ export function LancamentosPage() {
           >
             <span className="truncate">Importar CSV/XLSX</span>
           </button>
+          {/* Exporta todas as transações com os filtros atuais (download em streaming) */}
+          <a
+            href={exportUrl}
+            download
+            className="flex min-w-[84px] max-w-[480px] grow sm:grow-0 cursor-pointer items-center justify-center overflow-hidden rounded-lg h-10 px-4 bg-transparent border border-muted/50 text-muted hover:bg-white/5 hover:border-muted text-sm font-bold transition-colors"
+          >
+            <span className="truncate">Exportar CSV</span>
+          </a>
         </div>
       </header>
 
@@ -325,11 +450,60 @@ export function LancamentosPage() {
               </div>
             )}
 
+            {/* Barra de ações em lote */}
+            {selectedIds.size > 0 && (
+              <div className="flex flex-wrap items-center gap-3 border-b border-white/10 bg-primary/10 px-6 py-3 text-sm">
+                <span className="font-medium text-white">
+                  {selectedIds.size} selecionada(s)
+                </span>
+                <select
+                  className="h-9 rounded-lg border-none bg-background-dark text-white focus:ring-1 focus:ring-primary"
+                  value={bulkCategory}
+                  onChange={(e) => setBulkCategory(e.target.value)}
+                >
+                  <option value="">Sem categoria</option>
+                  {categories.map((category) => (
+                    <option key={category.id} value={category.name}>
+                      {category.name}
+                    </option>
+                  ))}
+                </select>
+                <button
+                  onClick={() => runBulkAction("recategorize")}
+                  disabled={bulkRunning}
+                  className="rounded-lg bg-primary px-4 py-2 font-medium text-white hover:bg-primary/80 disabled:opacity-50"
+                >
+                  Aplicar categoria
+                </button>
+                <button
+                  onClick={handleBulkDelete}
+                  disabled={bulkRunning}
+                  className="rounded-lg bg-negative/20 px-4 py-2 font-medium text-negative hover:bg-negative/30 disabled:opacity-50"
+                >
+                  Apagar selecionadas
+                </button>
+                <button
+                  onClick={() => setSelectedIds(new Set())}
+                  className="px-2 py-2 text-muted hover:text-white"
+                >
+                  Limpar seleção
+                </button>
+              </div>
+            )}
+
             {/* Tabela */}
             <div className="overflow-x-auto">
               <table className="min-w-full text-sm">
                 <thead className="border-b border-white/10">
                   <tr>
+                    <th className="w-10 px-4 py-3" scope="col">
+                      <input
+                        type="checkbox"
+                        checked={allSelected}
+                        onChange={toggleSelectAll}
+                        aria-label="Selecionar todas"
+                      />
+                    </th>
                     <th
                       className="px-6 py-3 text-left font-medium text-muted"
                       scope="col"
@@ -371,14 +545,14 @@ export function LancamentosPage() {
                 <tbody className="divide-y divide-white/10">
                   {loading && (
                     <tr>
-                      <td colSpan={6} className="p-6 text-center text-muted">
+                      <td colSpan={7} className="p-6 text-center text-muted">
                         Carregando transações...
                       </td>
                     </tr>
                   )}
                   {!loading && transactions.length === 0 && (
                     <tr>
-                      <td colSpan={6} className="p-6 text-center text-muted">
+                      <td colSpan={7} className="p-6 text-center text-muted">
                         Nenhuma transação encontrada para estes filtros.
                       </td>
                     </tr>
@@ -389,6 +563,14 @@ export function LancamentosPage() {
                         key={tx.id}
                         className="hover:bg-white/5 transition-colors"
                       >
+                        <td className="w-10 px-4 py-4">
+                          <input
+                            type="checkbox"
+                            checked={selectedIds.has(tx.id)}
+                            onChange={() => toggleSelected(tx.id)}
+                            aria-label="Selecionar lançamento"
+                          />
+                        </td>
                         <td className="whitespace-nowrap px-6 py-4 text-muted">
                           {format(
                             parseISO(tx.date + "T12:00:00"),
@@ -442,6 +624,24 @@ export function LancamentosPage() {
               </table>
             </div>
 
+            {/* Paginação */}
+            {!loading && summary && transactions.length > 0 && (
+              <div className="flex items-center justify-between border-t border-white/10 px-6 py-3 text-sm text-muted">
+                <span>
+                  Mostrando {transactions.length} de {summary.transaction_count}
+                </span>
+                {nextCursor && (
+                  <button
+                    onClick={loadMore}
+                    disabled={loadingMore}
+                    className="rounded-lg bg-white/10 px-4 py-2 font-medium text-white hover:bg-white/20 disabled:opacity-50"
+                  >
+                    {loadingMore ? "Carregando..." : "Carregar mais"}
+                  </button>
+                )}
+              </div>
+            )}
+
             {/* Sumário do Rodapé */}
             {summary && (
               <div className="grid grid-cols-1 gap-px border-t border-white/10 sm:grid-cols-3">